@@ -4,6 +4,11 @@ Cedar Test Host Module
 Shared test harness for running Cedar VM tests.
 """
 
+import contextlib
+import io
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import cedar_core as cedar
 import numpy as np
 
@@ -42,9 +47,11 @@ class CedarTestHost:
         )
         return buf_idx
 
-    def process(self, input_signal: np.ndarray) -> np.ndarray:
+    def process(self, input_signal: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
         """
         Run the program on the input signal.
+        If out is given (float32, at least len(input_signal) long), the result
+        is written into it so sweeps can reuse one output buffer.
         """
         # Load program into VM
         self.vm.load_program(self.program)
@@ -57,7 +64,8 @@ class CedarTestHost:
         input_padded = np.zeros(padded_len, dtype=np.float32)
         input_padded[:n_samples] = input_signal
 
-        output_left = []
+        if out is None:
+            out = np.empty(n_samples, dtype=np.float32)
 
         # Process block by block
         for i in range(n_blocks):
@@ -70,13 +78,81 @@ class CedarTestHost:
 
             # Run VM
             l, r = self.vm.process()
-            output_left.append(l)
+            stop = min(end, n_samples)
+            out[start:stop] = l[:stop - start]
+
+        return out[:n_samples]
+
+    def process_buffers(self, input_signal: np.ndarray, buffers) -> np.ndarray:
+        """
+        Run the program on the input signal and capture the given buffers.
+        Returns an array of shape (len(buffers), len(input_signal)), so several
+        instructions can be measured from a single pass over the input.
+        """
+        self.vm.load_program(self.program)
+
+        n_samples = len(input_signal)
+        n_blocks = (n_samples + cedar.BLOCK_SIZE - 1) // cedar.BLOCK_SIZE
+        padded_len = n_blocks * cedar.BLOCK_SIZE
+
+        input_padded = np.zeros(padded_len, dtype=np.float32)
+        input_padded[:n_samples] = input_signal
+
+        captured = np.empty((len(buffers), padded_len), dtype=np.float32)
+
+        for i in range(n_blocks):
+            start = i * cedar.BLOCK_SIZE
+            end = start + cedar.BLOCK_SIZE
+            self.vm.set_buffer(0, input_padded[start:end])
+            self.vm.process()
+            for row, buf_idx in enumerate(buffers):
+                captured[row, start:end] = self.vm.get_buffer(buf_idx)
 
-        return np.concatenate(output_left)[:n_samples]
+        return captured[:, :n_samples]
 
     def reset(self):
         """Reset the host for a new test."""
+        # VM.reset() keeps the parameter map, so a reused name would slew from
+        # its old value; a new VM starts every parameter at its set value
         self.vm = cedar.VM()
         self.vm.set_sample_rate(self.sr)
         self.program = []
         self.param_counter = 0
+
+
+def _run_captured(test):
+    """Run one test with stdout captured; return (output, passed)."""
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        try:
+            test()
+        except Exception:
+            traceback.print_exc(file=log)
+            return log.getvalue(), False
+    return log.getvalue(), True
+
+
+def run_tests_in_processes(tests):
+    """
+    Run tests side by side, each in a worker process of its own.
+    No VM or pyplot state survives from one test into the next. Each test's
+    output is printed as soon as it finishes; a test that raises prints its
+    partial output and traceback, and the remaining tests still run.
+    Tests share the cores with each other, so keep their FFTs single-threaded.
+    Returns the names of the tests that failed.
+    """
+    failed = []
+    with ProcessPoolExecutor(max_tasks_per_child=1) as pool:
+        futures = {pool.submit(_run_captured, test): test for test in tests}
+        for future in as_completed(futures):
+            name = futures[future].__name__
+            try:
+                log, passed = future.result()
+            except Exception:
+                # The worker died before it could report back
+                log, passed = f"{name}: worker failed\n{traceback.format_exc()}", False
+            print(log, end='', flush=True)
+            if not passed:
+                failed.append(name)
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+    return failed
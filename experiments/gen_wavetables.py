@@ -1,4 +1,6 @@
+import functools
 import numpy as np
+import scipy.fft
 from scipy.io import wavfile
 import os
 
@@ -12,18 +14,23 @@ def generate_additive(num_harmonics, amp_func, phase_shift=0):
     """
     Generates a single cycle waveform using additive synthesis.
     This ensures the source material is perfectly band-limited to the table size.
-    """
-    buffer = np.zeros(TABLE_SIZE)
-    t = np.linspace(0, 1, TABLE_SIZE, endpoint=False)
 
+    amp_func is evaluated on the whole array of harmonic numbers at once and
+    must return one amplitude per harmonic.
+    """
     # We sum harmonics up to the Nyquist limit of the table (size / 2)
     # But usually, for the "base" table, we want as much detail as possible.
     max_harmonics = min(num_harmonics, TABLE_SIZE // 2)
 
-    for k in range(1, max_harmonics + 1):
-        amp = amp_func(k)
-        if amp != 0:
-            buffer += amp * np.sin(2 * np.pi * k * t + phase_shift)
+    k = np.arange(1, max_harmonics + 1)
+    amps = np.broadcast_to(np.asarray(amp_func(k), dtype=np.float64), k.shape)
+
+    # Place each harmonic in its FFT bin and synthesize with one inverse FFT:
+    # amp * sin(2*pi*k*t + phase) is the bin value -j * amp * e^(j*phase) * N/2
+    spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+    spectrum[k] = -1j * amps * np.exp(1j * phase_shift) * (TABLE_SIZE / 2)
+    spectrum[TABLE_SIZE // 2] *= 2  # irfft does not mirror the Nyquist bin
+    buffer = scipy.fft.irfft(spectrum, n=TABLE_SIZE)
 
     # Normalize to -1.0 to 1.0
     max_val = np.max(np.abs(buffer))
@@ -33,48 +40,65 @@ def generate_additive(num_harmonics, amp_func, phase_shift=0):
     return buffer
 
 def morph_tables(table_a, table_b, steps):
-    """Linear interpolation between two tables over 'steps' frames."""
-    frames = []
-    for i in range(steps):
-        alpha = i / (steps - 1)
-        # Linear interpolation: A * (1-alpha) + B * alpha
-        frame = table_a * (1.0 - alpha) + table_b * alpha
-        frames.append(frame)
-    return frames
+    """
+    Linear interpolation between two tables over 'steps' frames.
+    Returns a (steps, TABLE_SIZE) array, one frame per row.
+    """
+    alpha = np.linspace(0, 1, steps)[:, None]
+    # Linear interpolation: A * (1-alpha) + B * alpha
+    return table_a * (1.0 - alpha) + table_b * alpha
 
 def save_wavetable(filename, frames):
-    """Concatenates frames and saves as 32-bit float WAV."""
-    data = np.concatenate(frames)
+    """Saves a (num_frames, TABLE_SIZE) array as 32-bit float WAV."""
+    # Converts at most once; float32 frames are written without any copy
+    frames = np.asarray(frames, dtype=np.float32)
 
     # Ensure directory exists
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
     path = os.path.join(OUTPUT_DIR, filename)
-    wavfile.write(path, SAMPLE_RATE, data.astype(np.float32))
+    wavfile.write(path, SAMPLE_RATE, frames.reshape(-1))
     print(f"Generated: {path} ({len(frames)} frames)")
 
 # --- Waveform Definitions ---
-
+# The basic shapes are cached, so the returned arrays are shared and read-only.
+
+def _cached_shape(func):
+    @functools.lru_cache(maxsize=None)
+    @functools.wraps(func)
+    def wrapper():
+        table = func()
+        table.setflags(write=False)
+        return table
+    return wrapper
+
+@_cached_shape
 def get_sine():
-    return generate_additive(1, lambda k: 1.0 if k==1 else 0)
+    return generate_additive(1, lambda k: np.where(k == 1, 1.0, 0.0))
 
+@_cached_shape
 def get_triangle():
     # Odd harmonics, amplitude 1/k^2, alternating signs
-    return generate_additive(1024, lambda k: (1/(k**2)) * (1 if k%4==1 else -1) if k%2==1 else 0)
+    return generate_additive(1024, lambda k: np.where(k % 2 == 1, np.where(k % 4 == 1, 1.0, -1.0) / k**2, 0.0))
 
+@_cached_shape
 def get_saw():
     # All harmonics, amplitude 1/k
-    return generate_additive(1024, lambda k: 1/k)
+    return generate_additive(1024, lambda k: 1 / k)
 
+@_cached_shape
 def get_square():
     # Odd harmonics, amplitude 1/k
-    return generate_additive(1024, lambda k: 1/k if k%2==1 else 0)
+    return generate_additive(1024, lambda k: np.where(k % 2 == 1, 1 / k, 0.0))
 
 def get_pulse(width):
-    """Naive generation for PWM to handle specific widths easily."""
+    """
+    Naive generation for PWM to handle specific widths easily.
+    An array of widths yields one pulse frame per width.
+    """
     t = np.linspace(0, 1, TABLE_SIZE, endpoint=False)
-    wave = np.where(t < width, 1.0, -1.0)
+    wave = np.where(t < np.asarray(width)[..., None], np.float32(1.0), np.float32(-1.0))
     return wave
 
 # --- Generators ---
@@ -87,50 +111,42 @@ def generate_basic_shapes():
     square = get_square()
 
     # Split 256 frames into 3 transition sections (approx 85 frames each)
-    frames = []
-    frames.extend(morph_tables(sine, tri, 85))
-    frames.extend(morph_tables(tri, saw, 85))
-    frames.extend(morph_tables(saw, square, 86)) # 85+85+86 = 256
+    frames = np.concatenate([
+        morph_tables(sine, tri, 85),
+        morph_tables(tri, saw, 85),
+        morph_tables(saw, square, 86), # 85+85+86 = 256
+    ])
 
     save_wavetable("Basic_Shapes.wav", frames)
 
 def generate_pwm_sweep():
     """Square wave with duty cycle sweeping from 50% to 5%"""
-    frames = []
-    for i in range(FRAMES_PER_TABLE):
-        # Sweep width from 0.5 (Square) down to 0.05 (Thin Pulse)
-        width = 0.5 - (0.45 * (i / FRAMES_PER_TABLE))
-        frames.append(get_pulse(width))
+    # Sweep width from 0.5 (Square) down to 0.05 (Thin Pulse)
+    widths = 0.5 - (0.45 * (np.arange(FRAMES_PER_TABLE) / FRAMES_PER_TABLE))
+    frames = get_pulse(widths)
 
     save_wavetable("PWM_Sweep.wav", frames)
 
 def generate_harmonic_sweep():
     """Fundamental -> Add Even Harmonics -> Add Odd Harmonics"""
-    frames = []
-
     # Create spectral frames directly
     t = np.linspace(0, 1, TABLE_SIZE, endpoint=False)
+    h = np.arange(1, 16)
+    partials = np.sin(2 * np.pi * h[:, None] * t)  # (15, TABLE_SIZE)
+
+    # Progress 0.0 to 1.0, one row per frame
+    prog = np.arange(FRAMES_PER_TABLE)[:, None] / FRAMES_PER_TABLE
+
+    # Harmonics come in one by one: each fades in once progress passes
+    # its threshold, with natural 1/h spectral roll-off
+    threshold = h / 16.0
+    amps = np.clip((prog - threshold) * 5.0, 0.0, 1.0) / h
+    amps[:, 0] = 1.0  # Base fundamental
+
+    frames = amps @ partials
 
-    for i in range(FRAMES_PER_TABLE):
-        # Progress 0.0 to 1.0
-        prog = i / FRAMES_PER_TABLE
-
-        # Base fundamental
-        wave = np.sin(2 * np.pi * t)
-
-        # Gradually introduce higher harmonics based on position
-        for h in range(2, 16):
-            # Calculate an amplitude envelope for this harmonic
-            # Harmonics come in one by one
-            threshold = (h / 16.0)
-            if prog > threshold:
-                amp = min(1.0, (prog - threshold) * 5.0) # Fade in
-                amp = amp * (1.0 / h) # Natural spectral roll-off
-                wave += amp * np.sin(2 * np.pi * h * t)
-
-        # Normalize
-        wave /= np.max(np.abs(wave))
-        frames.append(wave)
+    # Normalize
+    frames /= np.max(np.abs(frames), axis=1, keepdims=True)
 
     save_wavetable("Harmonic_Sweep.wav", frames)
 
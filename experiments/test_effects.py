@@ -1,11 +1,30 @@
+import functools
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import cedar_core as cedar
-from cedar_testing import CedarTestHost
+from cedar_testing import CedarTestHost, run_tests_in_processes
 from visualize import plot_spectrogram, plot_transfer_curve, save_figure
+from utils import find_peaks_above
+import scipy.fft
 import scipy.signal
 import scipy.io.wavfile
 
+# State IDs (16-bit truncated name hashes), computed once per module
+_H_DIST = cedar.hash("dist") & 0xFFFF
+_H_PHASER = cedar.hash("phaser") & 0xFFFF
+_H_VERB = cedar.hash("verb") & 0xFFFF
+_H_DELAY = cedar.hash("delay") & 0xFFFF
+_H_CHORUS = cedar.hash("chorus") & 0xFFFF
+_H_FLANGER = cedar.hash("flanger") & 0xFFFF
+_H_CRUSH2 = cedar.hash("crush2") & 0xFFFF
+_H_FOLD_TEST = cedar.hash("fold_test") & 0xFFFF
+_H_FOLD_ALIAS = cedar.hash("fold_alias") & 0xFFFF
+_H_FOLD_SYM = cedar.hash("fold_sym") & 0xFFFF
+_H_FOLD_SYM_SPEC = cedar.hash("fold_sym_spec") & 0xFFFF
+_H_FOLD_CONT = cedar.hash("fold_cont") & 0xFFFF
+
 # =============================================================================
 # Helper: Signal Generators
 # =============================================================================
@@ -16,7 +35,10 @@ def gen_linear_ramp(samples=1024):
 
 def gen_white_noise(duration, sr):
     """White noise for spectral analysis."""
-    return np.random.uniform(-0.5, 0.5, int(duration * sr)).astype(np.float32)
+    # Draw float32 directly rather than casting a float64 array
+    noise = np.random.default_rng().random(int(duration * sr), dtype=np.float32)
+    noise -= 0.5
+    return noise
 
 def gen_impulse(duration, sr):
     """Kronecker delta for reverb tails."""
@@ -24,6 +46,21 @@ def gen_impulse(duration, sr):
     x[0] = 1.0
     return x
 
+@functools.lru_cache(maxsize=4)
+def hann_window(size):
+    """Cached read-only float32 Hann window, as np.hanning(size)."""
+    window = np.hanning(size).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+def windowed_spectrum_db(block):
+    """Hann-windowed magnitude spectrum in dB, taken from |X|^2 to skip the sqrt."""
+    # float32 in keeps scipy.fft in single precision (complex64 out)
+    block = np.asarray(block, dtype=np.float32)
+    z = scipy.fft.rfft(block * hann_window(len(block)))
+    power = z.real * z.real + z.imag * z.imag
+    return 10 * np.log10(power + 1e-20)
+
 # =============================================================================
 # 1. Distortion Tests (Transfer Curves)
 # =============================================================================
@@ -31,7 +68,6 @@ def gen_impulse(duration, sr):
 def test_distortion_curves():
     print("Test: Distortion Transfer Curves")
 
-    host = CedarTestHost()
     ramp = gen_linear_ramp(2048)
 
     # Configuration for different distortion types
@@ -58,18 +94,18 @@ def test_distortion_curves():
             # Folder needs symmetry param
             buf_p2 = host.set_param("symmetry", 0.5)
             host.load_instruction(cedar.Instruction.make_ternary(
-                opcode, 1, buf_in, buf_p1, buf_p2, cedar.hash("dist") & 0xFFFF
+                opcode, 1, buf_in, buf_p1, buf_p2, _H_DIST
             ))
         elif opcode == cedar.Opcode.DISTORT_TUBE:
             # Tube needs bias
             buf_p2 = host.set_param("bias", 0.1)
             host.load_instruction(cedar.Instruction.make_ternary(
-                opcode, 1, buf_in, buf_p1, buf_p2, cedar.hash("dist") & 0xFFFF
+                opcode, 1, buf_in, buf_p1, buf_p2, _H_DIST
             ))
         else:
             # Standard unary distortion
             host.load_instruction(cedar.Instruction.make_binary(
-                opcode, 1, buf_in, buf_p1, cedar.hash("dist") & 0xFFFF
+                opcode, 1, buf_in, buf_p1, _H_DIST
             ))
 
         host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
@@ -114,7 +150,7 @@ def test_phaser_spectrogram():
     packed_rate = (8 << 4) | 6
 
     inst = cedar.Instruction.make_ternary(
-        cedar.Opcode.EFFECT_PHASER, 1, buf_in, buf_rate, buf_depth, cedar.hash("phaser") & 0xFFFF
+        cedar.Opcode.EFFECT_PHASER, 1, buf_in, buf_rate, buf_depth, _H_PHASER
     )
     inst.rate = packed_rate
 
@@ -155,7 +191,7 @@ def test_reverb_decay():
     # Dattorro(out, in, decay, predelay)
     # Rate: damping | mod_depth
     inst = cedar.Instruction.make_ternary(
-        cedar.Opcode.REVERB_DATTORRO, 1, buf_in, buf_decay, buf_predelay, cedar.hash("verb") & 0xFFFF
+        cedar.Opcode.REVERB_DATTORRO, 1, buf_in, buf_decay, buf_predelay, _H_VERB
     )
     inst.rate = (0 << 4) | 0 # No mod, no damping for clear tail
 
@@ -166,8 +202,11 @@ def test_reverb_decay():
 
     # Plot log-magnitude envelope
     time = np.arange(len(output)) / sr
-    env = np.abs(output)
-    env_db = 20 * np.log10(env + 1e-6)
+    # One buffer: clamp at the -100dB axis floor, then convert to dB in place
+    env_db = np.abs(output)
+    np.maximum(env_db, 1e-5, out=env_db)
+    np.log10(env_db, out=env_db)
+    env_db *= 20
 
     fig, ax = plt.subplots(figsize=(12, 6))
     ax.plot(time, env_db, linewidth=0.5, color='purple')
@@ -212,7 +251,7 @@ def test_delay_timing():
     # DELAY: out = delay(in, delay_ms, feedback)
     # Rate encodes mix (255 = fully wet)
     inst = cedar.Instruction.make_ternary(
-        cedar.Opcode.DELAY, buf_out, buf_in, buf_delay, buf_feedback, cedar.hash("delay") & 0xFFFF
+        cedar.Opcode.DELAY, buf_out, buf_in, buf_delay, buf_feedback, _H_DELAY
     )
     inst.rate = 255  # Fully wet
     host.load_instruction(inst)
@@ -221,13 +260,8 @@ def test_delay_timing():
     output = host.process(impulse)
 
     # Find peaks (echoes)
-    peaks = []
     threshold = 0.01
-    for i in range(1, len(output) - 1):
-        if output[i] > threshold and output[i] > output[i-1] and output[i] > output[i+1]:
-            # Check if this is a new peak (not too close to previous)
-            if len(peaks) == 0 or i - peaks[-1] > expected_delay_samples // 2:
-                peaks.append(i)
+    peaks = find_peaks_above(output, threshold, expected_delay_samples // 2)
 
     # Analyze echo timing
     if len(peaks) >= 2:
@@ -241,8 +275,8 @@ def test_delay_timing():
 
         # Check feedback decay (-6dB per echo for 0.5 feedback)
         if len(peaks) >= 3:
-            peak_levels = [output[p] for p in peaks[:5]]
-            print(f"  Echo levels: {[f'{20*np.log10(l+1e-10):.1f}dB' for l in peak_levels]}")
+            peak_levels_db = 20 * np.log10(output[peaks[:5]] + 1e-10)
+            print(f"  Echo levels: {[f'{l:.1f}dB' for l in peak_levels_db]}")
     else:
         print(f"  Only {len(peaks)} peaks found - insufficient for analysis")
 
@@ -262,7 +296,11 @@ def test_delay_timing():
 
     # Log scale for decay analysis
     ax2 = axes[1]
-    db_output = 20 * np.log10(np.abs(output) + 1e-10)
+    # Only take the log of samples above the -80dB axis floor; the rest sit on it
+    mag = np.abs(output)
+    audible = mag > 1e-4
+    db_output = np.full(len(output), -80.0)
+    db_output[audible] = 20 * np.log10(mag[audible])
     ax2.plot(time_ms, db_output, linewidth=0.5)
     ax2.set_xlabel('Time (ms)')
     ax2.set_ylabel('Amplitude (dB)')
@@ -293,8 +331,11 @@ def test_chorus_spectrum():
     host = CedarTestHost(sr)
 
     # Generate 440Hz sine
-    t = np.arange(int(duration * sr)) / sr
-    sine_input = np.sin(2 * np.pi * 440 * t).astype(np.float32) * 0.5
+    # One scratch buffer: phase, sine and gain in place, then a single cast
+    sine = np.arange(int(duration * sr)) * (2 * np.pi * 440 / sr)
+    np.sin(sine, out=sine)
+    sine *= 0.5
+    sine_input = sine.astype(np.float32)
 
     # Chorus parameters
     buf_in = 0
@@ -305,7 +346,7 @@ def test_chorus_spectrum():
     # EFFECT_CHORUS: out = chorus(in, rate, depth)
     # Rate field encodes mix
     inst = cedar.Instruction.make_ternary(
-        cedar.Opcode.EFFECT_CHORUS, buf_out, buf_in, buf_rate, buf_depth, cedar.hash("chorus") & 0xFFFF
+        cedar.Opcode.EFFECT_CHORUS, buf_out, buf_in, buf_rate, buf_depth, _H_CHORUS
     )
     inst.rate = 128  # 50% wet/dry mix
     host.load_instruction(inst)
@@ -319,8 +360,13 @@ def test_chorus_spectrum():
     steady_start = int(1.0 * sr)
     steady_output = output[steady_start:steady_start + fft_size]
 
-    freqs = np.fft.rfftfreq(fft_size, 1/sr)
-    spectrum = np.abs(np.fft.rfft(steady_output))
+    freqs = scipy.fft.rfftfreq(fft_size, 1/sr)
+    spectrum = np.abs(scipy.fft.rfft(steady_output))
+
+    # Everything below reads the 100-1000Hz band only, so drop the other bins before the log
+    band = (freqs > 100) & (freqs < 1000)
+    freqs = freqs[band]
+    spectrum = spectrum[band]
     spectrum_db = 20 * np.log10(spectrum + 1e-10)
 
     # Find fundamental and sidebands
@@ -342,8 +388,7 @@ def test_chorus_spectrum():
     fig, axes = plt.subplots(2, 1, figsize=(12, 8))
 
     ax1 = axes[0]
-    mask = (freqs > 100) & (freqs < 1000)
-    ax1.plot(freqs[mask], spectrum_db[mask], linewidth=1)
+    ax1.plot(freqs, spectrum_db, linewidth=1)
     ax1.axvline(440, color='red', linestyle='--', alpha=0.5, label='Fundamental (440Hz)')
     ax1.set_xlabel('Frequency (Hz)')
     ax1.set_ylabel('Magnitude (dB)')
@@ -398,7 +443,7 @@ def test_flanger_sweep():
     packed_rate = (feedback_int << 4) | mix_int
 
     inst = cedar.Instruction.make_ternary(
-        cedar.Opcode.EFFECT_FLANGER, buf_out, buf_in, buf_rate, buf_depth, cedar.hash("flanger") & 0xFFFF
+        cedar.Opcode.EFFECT_FLANGER, buf_out, buf_in, buf_rate, buf_depth, _H_FLANGER
     )
     inst.rate = packed_rate
     host.load_instruction(inst)
@@ -449,29 +494,35 @@ def test_bitcrush_levels():
 
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-    for idx, bits in enumerate(bit_depths):
-        host = CedarTestHost(sr)
-
-        # Generate slow sine (one cycle over duration)
-        t = np.arange(int(duration * sr)) / sr
-        sine_input = np.sin(2 * np.pi * 1 * t).astype(np.float32)  # 1 Hz
+    # Generate slow sine (one cycle over duration)
+    t = np.arange(int(duration * sr)) / sr
+    sine_input = np.sin(2 * np.pi * 1 * t).astype(np.float32)  # 1 Hz
 
-        buf_in = 0
-        buf_bits = host.set_param("bits", float(bits))
-        buf_rate = host.set_param("rate", 1.0)  # No sample rate reduction
-        buf_out = 1
+    # One program crushes the same input at every bit depth, each into its own buffer
+    host = CedarTestHost(sr)
+    buf_in = 0
+    buf_rate = host.set_param("rate", 1.0)  # No sample rate reduction
+    out_bufs = []
+    for idx, bits in enumerate(bit_depths):
+        buf_bits = host.set_param(f"bits_{bits}", float(bits))
+        buf_out = 1 + idx
 
         # DISTORT_BITCRUSH: out = bitcrush(in, bits, rate_factor)
         inst = cedar.Instruction.make_ternary(
-            cedar.Opcode.DISTORT_BITCRUSH, buf_out, buf_in, buf_bits, buf_rate, cedar.hash("crush") & 0xFFFF
+            cedar.Opcode.DISTORT_BITCRUSH, buf_out, buf_in, buf_bits, buf_rate,
+            cedar.hash(f"crush_{bits}") & 0xFFFF
         )
         host.load_instruction(inst)
-        host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, buf_out))
+        out_bufs.append(buf_out)
 
-        output = host.process(sine_input)
+    outputs = host.process_buffers(sine_input, out_bufs)
 
-        # Count unique levels (with some tolerance for floating point)
-        unique_levels = len(np.unique(np.round(output, 4)))
+    for idx, (bits, output) in enumerate(zip(bit_depths, outputs)):
+        # Count unique levels (with some tolerance for floating point):
+        # bucket to 4 decimals as integers and count occupied buckets, no sort needed
+        buckets = np.rint(output * 10000).astype(np.int64)
+        buckets -= buckets.min()
+        unique_levels = int(np.count_nonzero(np.bincount(buckets)))
         expected_levels = 2 ** bits
 
         print(f"  {bits}-bit: expected {expected_levels} levels, measured {unique_levels}")
@@ -506,7 +557,7 @@ def test_bitcrush_levels():
     buf_out2 = 1
 
     inst2 = cedar.Instruction.make_ternary(
-        cedar.Opcode.DISTORT_BITCRUSH, buf_out2, buf_in2, buf_bits2, buf_rate2, cedar.hash("crush2") & 0xFFFF
+        cedar.Opcode.DISTORT_BITCRUSH, buf_out2, buf_in2, buf_bits2, buf_rate2, _H_CRUSH2
     )
     host2.load_instruction(inst2)
     host2.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, buf_out2))
@@ -514,8 +565,8 @@ def test_bitcrush_levels():
     output2 = host2.process(hf_sine)
 
     # The output should have aliasing artifacts due to low sample rate
-    freqs = np.fft.rfftfreq(len(output2), 1/sr)
-    spectrum = 20 * np.log10(np.abs(np.fft.rfft(output2)) + 1e-10)
+    freqs = scipy.fft.rfftfreq(len(output2), 1/sr)
+    spectrum = 20 * np.log10(np.abs(scipy.fft.rfft(output2)) + 1e-10)
 
     # Find peaks below nyquist of reduced rate
     alias_freq = sr * 0.1 / 2  # ~2.4kHz nyquist
@@ -538,7 +589,6 @@ def test_distort_fold_transfer_curve():
     """
     print("Test: DISTORT_FOLD Transfer Curve")
 
-    host = CedarTestHost()
     ramp = gen_linear_ramp(4096)
 
     # Test various drive values
@@ -556,7 +606,7 @@ def test_distort_fold_transfer_curve():
 
         host.load_instruction(cedar.Instruction.make_ternary(
             cedar.Opcode.DISTORT_FOLD, 1, buf_in, buf_drive, buf_sym,
-            cedar.hash("fold_test") & 0xFFFF
+            _H_FOLD_TEST
         ))
         host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
 
@@ -598,12 +648,27 @@ def test_distort_fold_aliasing():
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle("DISTORT_FOLD Aliasing Analysis (ADAA vs No ADAA)")
 
+    # Time axis and sine buffers are shared by every test frequency
+    t = np.arange(int(duration * sr)) / sr
+    phase = np.empty_like(t)
+    sine_input = np.empty(len(t), dtype=np.float32)
+    output_buf = np.empty(len(t), dtype=np.float32)
+
+    # Spectrum layout is the same for every test frequency
+    fft_size = 8192
+    freqs_fft = scipy.fft.rfftfreq(fft_size, 1/sr)
+    nyquist = sr / 2
+    # Noise floor is measured between 100Hz and nyquist - 100Hz
+    band_mask = (freqs_fft > 100) & (freqs_fft < nyquist - 100)
+
     for freq, ax in zip(test_freqs, axes.flat):
         host = CedarTestHost(sr)
 
-        # Generate sine at test frequency
-        t = np.arange(int(duration * sr)) / sr
-        sine_input = np.sin(2 * np.pi * freq * t).astype(np.float32) * 0.8
+        # Generate sine at test frequency, in place in the shared buffers
+        np.multiply(t, 2 * np.pi * freq, out=phase)
+        np.sin(phase, out=phase)
+        phase *= 0.8
+        sine_input[:] = phase
 
         buf_in = 0
         buf_drive = host.set_param("drive", 4.0)  # Strong folding
@@ -611,54 +676,51 @@ def test_distort_fold_aliasing():
 
         host.load_instruction(cedar.Instruction.make_ternary(
             cedar.Opcode.DISTORT_FOLD, 1, buf_in, buf_drive, buf_sym,
-            cedar.hash("fold_alias") & 0xFFFF
+            _H_FOLD_ALIAS
         ))
         host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
 
-        output = host.process(sine_input)
+        output = host.process(sine_input, out=output_buf)
 
         # Save WAV for human evaluation
         wav_path = f"output/distort_fold_aliasing_{freq}hz.wav"
         scipy.io.wavfile.write(wav_path, sr, output)
 
         # Analyze spectrum
-        fft_size = 8192
         # Use steady-state portion
         steady = output[int(0.1 * sr):int(0.1 * sr) + fft_size]
-
-        freqs_fft = np.fft.rfftfreq(fft_size, 1/sr)
-        spectrum = np.abs(np.fft.rfft(steady * np.hanning(fft_size)))
-        spectrum_db = 20 * np.log10(spectrum + 1e-10)
+        spectrum_db = windowed_spectrum_db(steady)
 
         # Plot spectrum
         ax.plot(freqs_fft, spectrum_db, linewidth=0.5)
 
         # Mark harmonics and aliased components
-        nyquist = sr / 2
         fundamental_idx = int(freq * fft_size / sr)
         ax.axvline(freq, color='green', linestyle='--', alpha=0.5, label=f'Fund. {freq}Hz')
         ax.axvline(nyquist, color='red', linestyle='--', alpha=0.3, label='Nyquist')
 
-        # Expected harmonics from wavefolder: odd harmonics primarily
-        for h in [3, 5, 7, 9, 11]:
-            h_freq = freq * h
-            if h_freq < nyquist:
-                ax.axvline(h_freq, color='blue', linestyle=':', alpha=0.3)
-            else:
-                # Aliased frequency
-                aliased = sr - h_freq % sr if h_freq % sr > nyquist else h_freq % sr
-                ax.axvline(aliased, color='orange', linestyle=':', alpha=0.3)
+        # Expected harmonics from wavefolder: odd harmonics primarily.
+        # One vlines collection per colour instead of an axvline per harmonic.
+        odd_freqs = freq * np.array([3, 5, 7, 9, 11])
+        below = odd_freqs < nyquist
+        # Aliased frequency
+        wrapped = odd_freqs[~below] % sr
+        aliased = np.where(wrapped > nyquist, sr - wrapped, wrapped)
+        ax.vlines(odd_freqs[below], 0, 1, transform=ax.get_xaxis_transform(),
+                  colors='blue', linestyles=':', alpha=0.3)
+        ax.vlines(aliased, 0, 1, transform=ax.get_xaxis_transform(),
+                  colors='orange', linestyles=':', alpha=0.3)
 
         # Measure noise floor (away from harmonics)
-        harmonic_mask = np.ones(len(freqs_fft), dtype=bool)
-        for h in range(1, 20):
-            h_freq = freq * h
-            h_idx = int(h_freq * fft_size / sr) if h_freq < nyquist else 0
-            if h_idx > 0 and h_idx < len(harmonic_mask):
-                # Mask out ±5 bins around harmonic
-                harmonic_mask[max(0, h_idx-10):min(len(harmonic_mask), h_idx+10)] = False
+        harmonic_mask = band_mask.copy()
+        h_freqs = freq * np.arange(1, 20)
+        h_idx = (h_freqs[h_freqs < nyquist] * fft_size / sr).astype(np.int64)
+        h_idx = h_idx[(h_idx > 0) & (h_idx < len(harmonic_mask))]
+        # Mask out bins [h_idx-10, h_idx+10) around every harmonic in one scatter
+        masked = (h_idx[:, None] + np.arange(-10, 10)).ravel()
+        harmonic_mask[masked[(masked >= 0) & (masked < len(harmonic_mask))]] = False
 
-        noise_floor = np.median(spectrum_db[harmonic_mask & (freqs_fft > 100) & (freqs_fft < nyquist - 100)])
+        noise_floor = np.median(spectrum_db[harmonic_mask])
 
         ax.set_xlabel('Frequency (Hz)')
         ax.set_ylabel('Magnitude (dB)')
@@ -692,10 +754,10 @@ def test_distort_fold_symmetry():
     fig, axes = plt.subplots(2, 3, figsize=(15, 8))
     fig.suptitle("DISTORT_FOLD Symmetry Effect on Harmonics")
 
-    # Transfer curves
+    # Transfer curves (the ramp is the same for every symmetry value)
+    ramp = gen_linear_ramp(2048)
     for sym, ax in zip(symmetry_values, axes[0].flat):
         host = CedarTestHost(sr)
-        ramp = gen_linear_ramp(2048)
 
         buf_in = 0
         buf_drive = host.set_param("drive", 4.0)
@@ -703,7 +765,7 @@ def test_distort_fold_symmetry():
 
         host.load_instruction(cedar.Instruction.make_ternary(
             cedar.Opcode.DISTORT_FOLD, 1, buf_in, buf_drive, buf_sym,
-            cedar.hash("fold_sym") & 0xFFFF
+            _H_FOLD_SYM
         ))
         host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
 
@@ -724,14 +786,18 @@ def test_distort_fold_symmetry():
 
     # Harmonic comparison
     freq = 440.0
-    t = np.arange(int(duration * sr)) / sr
-    sine_input = np.sin(2 * np.pi * freq * t).astype(np.float32) * 0.7
+    sine = np.arange(int(duration * sr)) * (2 * np.pi * freq / sr)
+    np.sin(sine, out=sine)
+    sine *= 0.7
+    sine_input = sine.astype(np.float32)
 
     ax_harm = axes[1, 0]
     ax_spec = axes[1, 1]
 
     colors = plt.cm.viridis(np.linspace(0, 1, len(symmetry_values)))
     harmonic_data = {}
+    # Only spectra derived from output are kept, so every sweep step can reuse one buffer
+    output_buf = np.empty(len(sine_input), dtype=np.float32)
 
     for sym, color in zip(symmetry_values, colors):
         host = CedarTestHost(sr)
@@ -742,18 +808,17 @@ def test_distort_fold_symmetry():
 
         host.load_instruction(cedar.Instruction.make_ternary(
             cedar.Opcode.DISTORT_FOLD, 1, buf_in, buf_drive, buf_sym,
-            cedar.hash("fold_sym_spec") & 0xFFFF
+            _H_FOLD_SYM_SPEC
         ))
         host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
 
-        output = host.process(sine_input)
+        output = host.process(sine_input, out=output_buf)
 
         # Spectrum
         fft_size = 8192
         steady = output[int(0.1 * sr):int(0.1 * sr) + fft_size]
-        freqs_fft = np.fft.rfftfreq(fft_size, 1/sr)
-        spectrum = np.abs(np.fft.rfft(steady * np.hanning(fft_size)))
-        spectrum_db = 20 * np.log10(spectrum + 1e-10)
+        freqs_fft = scipy.fft.rfftfreq(fft_size, 1/sr)
+        spectrum_db = windowed_spectrum_db(steady)
 
         # Plot spectrum
         mask = (freqs_fft > 100) & (freqs_fft < 5000)
@@ -763,14 +828,11 @@ def test_distort_fold_symmetry():
         # Extract harmonics
         fundamental_idx = int(freq * fft_size / sr)
         fund_level = spectrum_db[fundamental_idx]
-        harmonics = []
-        for h in range(1, 8):
-            h_idx = fundamental_idx * h
-            if h_idx < len(spectrum_db):
-                harmonics.append(spectrum_db[h_idx] - fund_level)
-            else:
-                harmonics.append(-100)
-        harmonic_data[sym] = harmonics
+        h_idx = fundamental_idx * np.arange(1, 8)
+        valid = h_idx < len(spectrum_db)
+        harmonics = np.full(len(h_idx), -100.0)
+        harmonics[valid] = spectrum_db[h_idx[valid]] - fund_level
+        harmonic_data[sym] = harmonics.tolist()
 
     ax_spec.set_xlabel('Frequency (Hz)')
     ax_spec.set_ylabel('Magnitude (dB)')
@@ -821,7 +883,7 @@ def test_distort_fold_continuity():
 
     host.load_instruction(cedar.Instruction.make_ternary(
         cedar.Opcode.DISTORT_FOLD, 1, buf_in, buf_drive, buf_sym,
-        cedar.hash("fold_cont") & 0xFFFF
+        _H_FOLD_CONT
     ))
     host.load_instruction(cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, 1))
 
@@ -838,7 +900,9 @@ def test_distort_fold_continuity():
     axes[0, 0].grid(True, alpha=0.3)
 
     # Derivative (should be continuous for ADAA)
-    derivative = np.diff(output) / np.diff(ramp)
+    # The ramp has a constant step, so divide by it once instead of by np.diff(ramp)
+    dx = (float(ramp[-1]) - float(ramp[0])) / (len(ramp) - 1)
+    derivative = np.diff(output) * (1.0 / dx)
     axes[0, 1].plot(ramp[:-1], derivative, linewidth=0.5)
     axes[0, 1].set_title('Derivative (should be continuous)')
     axes[0, 1].set_xlabel('Input')
@@ -881,18 +945,20 @@ if __name__ == "__main__":
     import os
     os.makedirs('output', exist_ok=True)
 
-    # Original tests
-    test_distortion_curves()
-    test_phaser_spectrogram()
-    test_reverb_decay()
-    test_delay_timing()
-    test_chorus_spectrum()
-    test_flanger_sweep()
-    test_bitcrush_levels()
-
-    # New DISTORT_FOLD ADAA tests
-    print("\n=== DISTORT_FOLD ADAA Tests ===")
-    test_distort_fold_transfer_curve()
-    test_distort_fold_aliasing()
-    test_distort_fold_symmetry()
-    test_distort_fold_continuity()
\ No newline at end of file
+    tests = [
+        # Original tests
+        test_distortion_curves,
+        test_phaser_spectrogram,
+        test_reverb_decay,
+        test_delay_timing,
+        test_chorus_spectrum,
+        test_flanger_sweep,
+        test_bitcrush_levels,
+        # New DISTORT_FOLD ADAA tests
+        test_distort_fold_transfer_curve,
+        test_distort_fold_aliasing,
+        test_distort_fold_symmetry,
+        test_distort_fold_continuity,
+    ]
+
+    run_tests_in_processes(tests)
@@ -5,28 +5,91 @@ Tests for ENV_ADSR, ENV_AR, and ENV_FOLLOWER opcodes.
 Validates timing accuracy, gate behavior, and signal tracking.
 """
 
+import argparse
+import functools
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Figures are only written to files; skip interactive backend setup
 import matplotlib.pyplot as plt
 import json
 import os
 from scipy.io import wavfile
+from scipy.signal import lfilter
 import cedar_core as cedar
+from cedar_testing import run_tests_in_processes
 from visualize import save_figure
-from utils import rms, ms_to_samples, samples_to_ms
+from utils import rms, mean_std, ms_to_samples, samples_to_ms, find_peaks_above, NumpyEncoder
 
+# Set CEDAR_TEST_NO_PLOT=1 or pass --no-plot to skip the curve-shape and
+# exponential-accuracy figures; the JSON results are written either way
+PLOT = not os.environ.get('CEDAR_TEST_NO_PLOT')
 
-class NumpyEncoder(json.JSONEncoder):
-    """JSON encoder that handles numpy types."""
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, np.bool_):
-            return bool(obj)
-        return super().default(obj)
+@functools.lru_cache(maxsize=16)
+def _time_ms(num_samples: int, sr: int) -> np.ndarray:
+    """Cached read-only time axis in milliseconds for plotting."""
+    time_ms = np.arange(num_samples) / sr * 1000
+    time_ms.setflags(write=False)
+    return time_ms
+
+
+def exp_decay_curve(num_samples: int, tau_samples: float,
+                    dtype=np.float64) -> np.ndarray:
+    """Ideal exponential decay exp(-n / tau_samples), starting at 1.0.
+
+    Generated as the impulse response of the equivalent one-pole
+    recursion y[n] = r * y[n-1] + x[n], with r = exp(-1 / tau_samples),
+    so only one exp is evaluated. The recursion always runs in float64;
+    dtype only sets the returned precision.
+
+    Args:
+        num_samples: Curve length in samples
+        tau_samples: Time constant in samples
+        dtype: Output dtype, e.g. np.float32 to match VM output
+
+    Returns:
+        Curve of length num_samples
+    """
+    impulse = np.zeros(num_samples)
+    impulse[0] = 1.0
+    curve = lfilter([1.0], [1.0, -np.exp(-1.0 / tau_samples)], impulse)
+    return curve.astype(dtype, copy=False)
+
+
+def plot_stride(num_samples: int, max_points: int = 2000) -> slice:
+    """Slice that thins a smooth curve to about max_points vertices for plotting.
+
+    Only for slowly varying traces such as envelopes; audio-rate signals
+    would alias.
+    """
+    return slice(None, None, max(1, num_samples // max_points))
+
+
+def step_trace(x: np.ndarray, y: np.ndarray) -> tuple:
+    """Reduce a piecewise-constant trace to its change points.
+
+    Plot the result with drawstyle='steps-post' to draw the same shape
+    with a handful of vertices instead of one per sample.
+
+    Args:
+        x: X values (e.g. time axis)
+        y: Piecewise-constant signal, same length as x
+
+    Returns:
+        (x, y) at the first sample, every change, and the last sample
+    """
+    change = np.flatnonzero(y[1:] != y[:-1]) + 1
+    idx = np.concatenate(([0], change, [len(y) - 1]))
+    return x[idx], y[idx]
+
+
+def plot_trace(ax, *args, **kwargs):
+    """Plot a full-length trace, rasterized, with sub-pixel segments merged.
+
+    The simplify threshold is fixed in the line's path when it is created,
+    so the one-pixel setting only applies to traces drawn through here.
+    """
+    with plt.rc_context({'path.simplify_threshold': 1.0}):
+        return ax.plot(*args, rasterized=True, **kwargs)
 
 
 def save_wav(filename: str, data: np.ndarray, sample_rate: int = 48000):
@@ -34,8 +97,10 @@ def save_wav(filename: str, data: np.ndarray, sample_rate: int = 48000):
     wav_dir = 'output/wav'
     os.makedirs(wav_dir, exist_ok=True)
     filepath = os.path.join(wav_dir, filename)
-    data_clipped = np.clip(data, -1.0, 1.0)
-    data_int16 = (data_clipped * 32767).astype(np.int16)
+    # Scale, clip and truncate through one float32 scratch buffer
+    scaled = np.multiply(data, 32767.0, dtype=np.float32)
+    np.clip(scaled, -32767.0, 32767.0, out=scaled)
+    data_int16 = scaled.astype(np.int16)
     wavfile.write(filepath, sample_rate, data_int16)
     print(f"    Saved: {filepath}")
 
@@ -49,6 +114,16 @@ class EnvelopeTestHost:
         self.sr = sample_rate
         self.program = []
 
+    def reset(self):
+        """Clear envelope state and buffers, keeping the current program.
+
+        Parameter values survive, so only use this to rerun the same program.
+        """
+        # VM.reset() also drops the loaded program; parameters are kept
+        self.vm.reset()
+        if self.program:
+            self.vm.load_program(self.program)
+
     def create_adsr_program(self, attack: float, decay: float, sustain: float,
                             release: float, state_id: int = 1):
         """Create ENV_ADSR program.
@@ -105,6 +180,48 @@ class EnvelopeTestHost:
 
         self.vm.load_program(self.program)
 
+    def create_adsr_bank(self, configs, state_id_base: int = 1) -> list:
+        """Create one program running an ENV_ADSR per config on the same gate.
+
+        Every envelope reads gate buffer 0 and gets its own parameters, state
+        and output buffer, so a single pass evaluates all configs.
+
+        Args:
+            configs: Sequence of (attack, decay, sustain, release) tuples,
+                times in seconds
+            state_id_base: State ID of the first envelope; the rest follow on
+
+        Returns:
+            Output buffer index for each config, for run_with_gate_buffers
+        """
+        self.program = []
+        out_bufs = []
+
+        for i, params in enumerate(configs):
+            # Buffers 100+: per-envelope attack/decay/sustain/release
+            param_bufs = []
+            for j, (name, value) in enumerate(zip(('attack', 'decay', 'sustain', 'release'), params)):
+                param_name = f"{name}_{i}"
+                param_buf = 100 + 4 * i + j
+                self.vm.set_param(param_name, value)
+                self.program.append(
+                    cedar.Instruction.make_nullary(cedar.Opcode.ENV_GET, param_buf,
+                                                   cedar.hash(param_name) & 0xFFFF)
+                )
+                param_bufs.append(param_buf)
+
+            # Buffers 10+: envelope outputs
+            out_buf = 10 + i
+            self.program.append(
+                cedar.Instruction.make_quinary(
+                    cedar.Opcode.ENV_ADSR, out_buf, 0, *param_bufs, state_id_base + i
+                )
+            )
+            out_bufs.append(out_buf)
+
+        self.vm.load_program(self.program)
+        return out_bufs
+
     def create_ar_program(self, attack: float, release: float, state_id: int = 1):
         """Create ENV_AR program.
 
@@ -183,23 +300,93 @@ class EnvelopeTestHost:
 
         self.vm.load_program(self.program)
 
-    def run_with_gate(self, gate_signal: np.ndarray) -> np.ndarray:
-        """Run with a gate signal, returning envelope output."""
+    def _gate_blocks(self, gate_signal: np.ndarray) -> np.ndarray:
+        """Gate signal as (num_blocks, BLOCK_SIZE) rows, zero-padded at the end."""
         num_blocks = (len(gate_signal) + cedar.BLOCK_SIZE - 1) // cedar.BLOCK_SIZE
         padded_len = num_blocks * cedar.BLOCK_SIZE
 
-        gate_padded = np.zeros(padded_len, dtype=np.float32)
-        gate_padded[:len(gate_signal)] = gate_signal
+        if len(gate_signal) == padded_len:
+            # Already block aligned (e.g. whole seconds at 48kHz): no padded copy needed
+            gate_padded = np.ascontiguousarray(gate_signal, dtype=np.float32)
+        else:
+            gate_padded = np.zeros(padded_len, dtype=np.float32)
+            gate_padded[:len(gate_signal)] = gate_signal
+
+        return gate_padded.reshape(num_blocks, cedar.BLOCK_SIZE)
 
-        output = []
-        for i in range(num_blocks):
-            start = i * cedar.BLOCK_SIZE
-            end = start + cedar.BLOCK_SIZE
-            self.vm.set_buffer(0, gate_padded[start:end])
+    def run_with_gate(self, gate_signal: np.ndarray) -> np.ndarray:
+        """Run with a gate signal, returning envelope output."""
+        gate_blocks = self._gate_blocks(gate_signal)
+
+        # Write each block straight into the result instead of concatenating at the end.
+        # Row views over both buffers keep the per-block Python work to the VM calls.
+        out_blocks = np.empty(gate_blocks.shape, dtype=np.float32)
+        for block_in, block_out in zip(gate_blocks, out_blocks):
+            self.vm.set_buffer(0, block_in)
             left, right = self.vm.process()
-            output.append(left)
+            block_out[:] = left
+
+        return out_blocks.reshape(-1)[:len(gate_signal)]
+
+    def run_with_gate_buffers(self, gate_signal: np.ndarray, buffers) -> np.ndarray:
+        """Run with a gate signal, capturing several buffers.
+
+        Returns:
+            Array of shape (len(buffers), len(gate_signal))
+        """
+        gate_blocks = self._gate_blocks(gate_signal)
+        num_blocks = len(gate_blocks)
+
+        captured = np.empty((len(buffers), num_blocks, cedar.BLOCK_SIZE), dtype=np.float32)
+        for i, block_in in enumerate(gate_blocks):
+            self.vm.set_buffer(0, block_in)
+            self.vm.process()
+            for row, buf_idx in enumerate(buffers):
+                captured[row, i] = self.vm.get_buffer(buf_idx)
+
+        return captured.reshape(len(buffers), -1)[:, :len(gate_signal)]
+
+
+# Searches compare this many samples at a time, so an early hit stops the scan
+_SCAN_CHUNK = 4096
+
+
+def _first_crossing(signal: np.ndarray, threshold: float, start_idx: int,
+                    rising: bool, strict: bool = False) -> int:
+    """Index of the first sample from start_idx that reaches threshold, or -1.
+
+    With strict=True the sample must pass the threshold, not just touch it.
+    """
+    if rising:
+        compare = np.greater if strict else np.greater_equal
+    else:
+        compare = np.less if strict else np.less_equal
+    for lo in range(start_idx, len(signal), _SCAN_CHUNK):
+        chunk = signal[lo:lo + _SCAN_CHUNK]
+        hits = compare(chunk, threshold)
+        hit = int(np.argmax(hits))
+        if hits[hit]:
+            return lo + hit
+    return -1
+
+
+def theoretical_crossing_sample(time_sec: float, sr: int, level: float) -> int:
+    """Samples from the trigger until an ENV_ADSR/ENV_AR attack first reaches level.
 
-        return np.concatenate(output)[:len(gate_signal)]
+    The opcodes step level += a * (1 - level), a = 1 - exp(-4.6 / N), before
+    writing each sample, so out[n] = 1 - exp(-4.6 * (n + 1) / N) and the
+    crossing has a closed form.
+
+    Args:
+        time_sec: Attack time in seconds
+        sr: Sample rate
+        level: Target level (e.g., 0.99)
+
+    Returns:
+        Sample offset of the first output at or above level
+    """
+    time_samples = max(0.001, time_sec) * sr
+    return int(np.ceil(np.log(1.0 - level) * time_samples / -4.6)) - 1
 
 
 def measure_envelope_time(signal: np.ndarray, threshold: float, sr: int,
@@ -216,26 +403,15 @@ def measure_envelope_time(signal: np.ndarray, threshold: float, sr: int,
     Returns:
         Dict with timing information
     """
-    if direction == 'rising':
-        for i in range(start_idx, len(signal)):
-            if signal[i] >= threshold:
-                return {
-                    'reached_threshold': True,
-                    'sample_index': i,
-                    'time_seconds': (i - start_idx) / sr,
-                    'time_ms': (i - start_idx) / sr * 1000,
-                    'final_value': float(signal[i])
-                }
-    else:  # falling
-        for i in range(start_idx, len(signal)):
-            if signal[i] <= threshold:
-                return {
-                    'reached_threshold': True,
-                    'sample_index': i,
-                    'time_seconds': (i - start_idx) / sr,
-                    'time_ms': (i - start_idx) / sr * 1000,
-                    'final_value': float(signal[i])
-                }
+    i = _first_crossing(signal, threshold, start_idx, rising=(direction == 'rising'))
+    if i >= 0:
+        return {
+            'reached_threshold': True,
+            'sample_index': i,
+            'time_seconds': (i - start_idx) / sr,
+            'time_ms': (i - start_idx) / sr * 1000,
+            'final_value': float(signal[i])
+        }
 
     return {
         'reached_threshold': False,
@@ -257,11 +433,18 @@ def find_gate_edge(gate: np.ndarray, edge_type: str = 'rising', start_idx: int =
     Returns:
         Index of edge, or -1 if not found
     """
-    for i in range(start_idx + 1, len(gate)):
-        if edge_type == 'rising' and gate[i-1] <= 0 and gate[i] > 0:
-            return i
-        elif edge_type == 'falling' and gate[i-1] > 0 and gate[i] <= 0:
-            return i
+    if edge_type not in ('rising', 'falling'):
+        return -1
+
+    for lo in range(start_idx + 1, len(gate), _SCAN_CHUNK):
+        curr = gate[lo:lo + _SCAN_CHUNK]
+        prev = gate[lo - 1:lo - 1 + len(curr)]
+        if edge_type == 'rising':
+            edges = np.flatnonzero((prev <= 0) & (curr > 0))
+        else:
+            edges = np.flatnonzero((prev > 0) & (curr <= 0))
+        if edges.size:
+            return lo + int(edges[0])
     return -1
 
 
@@ -293,6 +476,21 @@ def test_adsr_timing():
 
     fig, axes = plt.subplots(len(test_configs), 2, figsize=(16, 4 * len(test_configs)))
 
+    # Every config shares the same gate: on for 0.5s, then off. Run all envelopes in one
+    # VM pass over the longest gate; each config then reads only its own length.
+    gate_on_time = 0.5
+    gate_on_samples = int(gate_on_time * sr)
+    max_release = max(config['release'] for config in test_configs)
+    full_gate = np.zeros(int((gate_on_time + max_release + 0.2) * sr), dtype=np.float32)
+    full_gate[:gate_on_samples] = 1.0
+
+    host = EnvelopeTestHost(sr)
+    out_bufs = host.create_adsr_bank(
+        [(c['attack'], c['decay'], c['sustain'], c['release']) for c in test_configs],
+        state_id_base=1
+    )
+    all_outputs = host.run_with_gate_buffers(full_gate, out_bufs)
+
     for idx, config in enumerate(test_configs):
         attack = config['attack']
         decay = config['decay']
@@ -300,18 +498,11 @@ def test_adsr_timing():
         release = config['release']
         name = config['name']
 
-        # Create gate: on for 0.5s, then off
-        gate_on_time = 0.5
         total_time = gate_on_time + release + 0.2  # Extra time for release
         num_samples = int(total_time * sr)
 
-        gate = np.zeros(num_samples, dtype=np.float32)
-        gate_on_samples = int(gate_on_time * sr)
-        gate[:gate_on_samples] = 1.0
-
-        host = EnvelopeTestHost(sr)
-        host.create_adsr_program(attack, decay, sustain, release, state_id=idx+1)
-        output = host.run_with_gate(gate)
+        gate = full_gate[:num_samples]
+        output = all_outputs[idx, :num_samples]
 
         # Measure attack time (to 99% of peak)
         attack_result = measure_envelope_time(output, 0.99, sr, start_idx=0, direction='rising')
@@ -372,9 +563,9 @@ def test_adsr_timing():
 
         # Plot envelope
         ax1 = axes[idx, 0]
-        time_ms = np.arange(len(output)) / sr * 1000
-        ax1.plot(time_ms, output, 'b-', linewidth=1, label='Envelope')
-        ax1.plot(time_ms, gate * 0.5, 'g--', linewidth=0.5, alpha=0.5, label='Gate (scaled)')
+        time_ms = _time_ms(len(output), sr)
+        plot_trace(ax1, time_ms, output, 'b-', linewidth=1, label='Envelope')
+        plot_trace(ax1, time_ms, gate * 0.5, 'g--', linewidth=0.5, alpha=0.5, label='Gate (scaled)')
 
         # Mark stages
         ax1.axvline(attack_result['time_ms'], color='red', linestyle=':', alpha=0.7, label=f'Attack end')
@@ -434,9 +625,9 @@ def test_adsr_gate_edges():
 
     # Test 1: Multiple short gates (retriggering)
     gate1 = np.zeros(int(1.0 * sr), dtype=np.float32)
-    for i in range(4):
-        start = int((0.1 + i * 0.2) * sr)
-        end = int((0.2 + i * 0.2) * sr)
+    gate_starts = ((0.1 + np.arange(4) * 0.2) * sr).astype(np.int64)
+    gate_ends = ((0.2 + np.arange(4) * 0.2) * sr).astype(np.int64)
+    for start, end in zip(gate_starts, gate_ends):
         gate1[start:end] = 1.0
 
     host = EnvelopeTestHost(sr)
@@ -444,10 +635,7 @@ def test_adsr_gate_edges():
     output1 = host.run_with_gate(gate1)
 
     # Count peaks
-    peaks = []
-    for i in range(1, len(output1) - 1):
-        if output1[i] > output1[i-1] and output1[i] > output1[i+1] and output1[i] > 0.9:
-            peaks.append(i)
+    peaks = find_peaks_above(output1, 0.9)
 
     results['tests'].append({
         'name': 'Retrigger',
@@ -459,9 +647,9 @@ def test_adsr_gate_edges():
     print(f"  Retrigger test: 4 gates -> {len(peaks)} peaks detected")
 
     ax1 = axes[0, 0]
-    time_ms = np.arange(len(output1)) / sr * 1000
-    ax1.plot(time_ms, output1, 'b-', linewidth=1, label='Envelope')
-    ax1.plot(time_ms, gate1 * 0.3, 'g--', linewidth=0.5, alpha=0.5, label='Gate')
+    time_ms = _time_ms(len(output1), sr)
+    plot_trace(ax1, time_ms, output1, 'b-', linewidth=1, label='Envelope')
+    ax1.plot(*step_trace(time_ms, gate1 * 0.3), 'g--', linewidth=0.5, alpha=0.5, drawstyle='steps-post', label='Gate')
     ax1.set_xlabel('Time (ms)')
     ax1.set_ylabel('Level')
     ax1.set_title('Retrigger Behavior (4 short gates)')
@@ -491,9 +679,9 @@ def test_adsr_gate_edges():
     print(f"  Short gate test: gate=5ms, attack={attack*1000:.0f}ms -> peak={peak_value:.3f}")
 
     ax2 = axes[0, 1]
-    time_ms2 = np.arange(len(output2)) / sr * 1000
-    ax2.plot(time_ms2, output2, 'b-', linewidth=1, label='Envelope')
-    ax2.plot(time_ms2, gate2 * 0.3, 'g--', linewidth=0.5, alpha=0.5, label='Gate')
+    time_ms2 = _time_ms(len(output2), sr)
+    plot_trace(ax2, time_ms2, output2, 'b-', linewidth=1, label='Envelope')
+    ax2.plot(*step_trace(time_ms2, gate2 * 0.3), 'g--', linewidth=0.5, alpha=0.5, drawstyle='steps-post', label='Gate')
     ax2.axvline(5, color='red', linestyle=':', alpha=0.7, label='Gate off')
     ax2.set_xlabel('Time (ms)')
     ax2.set_ylabel('Level')
@@ -523,9 +711,9 @@ def test_adsr_gate_edges():
     print(f"  Retrigger during release: level at retrigger={level_at_retrigger:.3f}")
 
     ax3 = axes[1, 0]
-    time_ms3 = np.arange(len(output3)) / sr * 1000
-    ax3.plot(time_ms3, output3, 'b-', linewidth=1, label='Envelope')
-    ax3.plot(time_ms3, gate3 * 0.3, 'g--', linewidth=0.5, alpha=0.5, label='Gate')
+    time_ms3 = _time_ms(len(output3), sr)
+    plot_trace(ax3, time_ms3, output3, 'b-', linewidth=1, label='Envelope')
+    ax3.plot(*step_trace(time_ms3, gate3 * 0.3), 'g--', linewidth=0.5, alpha=0.5, drawstyle='steps-post', label='Gate')
     ax3.axvline(150, color='red', linestyle=':', alpha=0.7, label='Retrigger')
     ax3.set_xlabel('Time (ms)')
     ax3.set_ylabel('Level')
@@ -557,9 +745,9 @@ def test_adsr_gate_edges():
     print(f"  Sustain accuracy: expected={sustain:.2f}, measured={sustain_measured:.4f}, error={sustain_error:.2f}%")
 
     ax4 = axes[1, 1]
-    time_ms4 = np.arange(len(output4)) / sr * 1000
-    ax4.plot(time_ms4, output4, 'b-', linewidth=1, label='Envelope')
-    ax4.plot(time_ms4, gate4 * 0.3, 'g--', linewidth=0.5, alpha=0.5, label='Gate')
+    time_ms4 = _time_ms(len(output4), sr)
+    plot_trace(ax4, time_ms4, output4, 'b-', linewidth=1, label='Envelope')
+    ax4.plot(*step_trace(time_ms4, gate4 * 0.3), 'g--', linewidth=0.5, alpha=0.5, drawstyle='steps-post', label='Gate')
     ax4.axhline(sustain, color='orange', linestyle='--', alpha=0.7, label=f'Target sustain={sustain}')
     ax4.axhline(sustain_measured, color='red', linestyle=':', alpha=0.7, label=f'Measured={sustain_measured:.3f}')
     ax4.set_xlabel('Time (ms)')
@@ -648,8 +836,8 @@ def test_ar_envelope():
 
         # Plot full envelope
         ax1 = axes[idx, 0]
-        time_ms = np.arange(len(output)) / sr * 1000
-        ax1.plot(time_ms, output, 'b-', linewidth=1, label='Envelope')
+        time_ms = _time_ms(len(output), sr)
+        plot_trace(ax1, time_ms, output, 'b-', linewidth=1, label='Envelope')
         ax1.axvline(100/sr*1000, color='green', linestyle='--', alpha=0.5, label='Trigger')
         ax1.set_xlabel('Time (ms)')
         ax1.set_ylabel('Level')
@@ -688,10 +876,7 @@ def test_ar_envelope():
     output = host.run_with_gate(trigger)
 
     # Find peaks
-    peaks = []
-    for i in range(1, len(output) - 1):
-        if output[i] > output[i-1] and output[i] > output[i+1] and output[i] > 0.8:
-            peaks.append(i)
+    peaks = find_peaks_above(output, 0.8)
 
     print(f"    2 triggers -> {len(peaks)} peaks detected")
 
@@ -737,9 +922,9 @@ def test_envelope_follower():
     print(f"    Input=0.8 DC, Output={steady_value:.4f}, Error={dc_error:.2f}%")
 
     ax1 = axes[0, 0]
-    time_ms = np.arange(len(dc_output)) / sr * 1000
-    ax1.plot(time_ms, dc_signal, 'g--', linewidth=0.5, alpha=0.5, label='Input')
-    ax1.plot(time_ms, dc_output, 'b-', linewidth=1, label='Follower')
+    time_ms = _time_ms(len(dc_output), sr)
+    plot_trace(ax1, time_ms, dc_signal, 'g--', linewidth=0.5, alpha=0.5, label='Input')
+    plot_trace(ax1, time_ms, dc_output, 'b-', linewidth=1, label='Follower')
     ax1.set_xlabel('Time (ms)')
     ax1.set_ylabel('Level')
     ax1.set_title('DC Tracking')
@@ -759,8 +944,7 @@ def test_envelope_follower():
 
     # The follower should track the rectified signal's peaks
     steady_region = sine_output[int(0.2 * sr):]
-    avg_level = np.mean(steady_region)
-    ripple = np.std(steady_region)
+    avg_level, ripple = mean_std(steady_region)
 
     results['tests'].append({
         'name': 'Sine tracking',
@@ -772,9 +956,9 @@ def test_envelope_follower():
     print(f"    Input amplitude=0.9, Avg output={avg_level:.4f}, Ripple={ripple:.4f}")
 
     ax2 = axes[0, 1]
-    time_ms2 = np.arange(len(sine_output)) / sr * 1000
-    ax2.plot(time_ms2, np.abs(sine_signal), 'g--', linewidth=0.3, alpha=0.5, label='|Input|')
-    ax2.plot(time_ms2, sine_output, 'b-', linewidth=1, label='Follower')
+    time_ms2 = _time_ms(len(sine_output), sr)
+    plot_trace(ax2, time_ms2, np.abs(sine_signal), 'g--', linewidth=0.3, alpha=0.5, label='|Input|')
+    plot_trace(ax2, time_ms2, sine_output, 'b-', linewidth=1, label='Follower')
     ax2.set_xlabel('Time (ms)')
     ax2.set_ylabel('Level')
     ax2.set_title('Sine Wave Tracking')
@@ -807,9 +991,9 @@ def test_envelope_follower():
     print(f"    Release time: {release_result['time_ms']:.2f}ms")
 
     ax3 = axes[1, 0]
-    time_ms3 = np.arange(len(step_output)) / sr * 1000
-    ax3.plot(time_ms3, step_signal, 'g--', linewidth=0.5, alpha=0.5, label='Input')
-    ax3.plot(time_ms3, step_output, 'b-', linewidth=1, label='Follower')
+    time_ms3 = _time_ms(len(step_output), sr)
+    plot_trace(ax3, time_ms3, step_signal, 'g--', linewidth=0.5, alpha=0.5, label='Input')
+    plot_trace(ax3, time_ms3, step_output, 'b-', linewidth=1, label='Follower')
     ax3.set_xlabel('Time (ms)')
     ax3.set_ylabel('Level')
     ax3.set_title('Asymmetric Attack/Release (fast attack, slow release)')
@@ -819,23 +1003,19 @@ def test_envelope_follower():
     # Test 4: Burst tracking
     print("\n  Burst Tracking:")
     burst_signal = np.zeros(int(1.0 * sr), dtype=np.float32)
-    # Create bursts of sine waves
-    for i in range(4):
-        start = int((0.1 + i * 0.2) * sr)
-        end = int((0.15 + i * 0.2) * sr)
-        t_burst = np.arange(end - start) / sr
-        burst_signal[start:end] = np.sin(2 * np.pi * 440 * t_burst) * 0.8
+    # Create bursts of sine waves: every burst is the same 50ms sine, so compute it once
+    burst_starts = ((0.1 + np.arange(4) * 0.2) * sr).astype(np.int64)
+    t_burst = np.arange(int(0.05 * sr)) / sr
+    burst = np.sin(2 * np.pi * 440 * t_burst) * 0.8
+    for start in burst_starts:
+        burst_signal[start:start + len(burst)] = burst
 
     host4 = EnvelopeTestHost(sr)
     host4.create_follower_program(attack=0.001, release=0.02, state_id=303)
     burst_output = host4.run_with_gate(burst_signal)
 
     # Count envelope peaks
-    env_peaks = []
-    for i in range(1, len(burst_output) - 1):
-        if burst_output[i] > burst_output[i-1] and burst_output[i] > burst_output[i+1] and burst_output[i] > 0.5:
-            if len(env_peaks) == 0 or i - env_peaks[-1] > sr * 0.05:  # Minimum 50ms between peaks
-                env_peaks.append(i)
+    env_peaks = find_peaks_above(burst_output, 0.5, min_gap=sr * 0.05)  # Minimum 50ms between peaks
 
     results['tests'].append({
         'name': 'Burst tracking',
@@ -846,9 +1026,9 @@ def test_envelope_follower():
     print(f"    4 bursts -> {len(env_peaks)} envelope peaks detected")
 
     ax4 = axes[1, 1]
-    time_ms4 = np.arange(len(burst_output)) / sr * 1000
-    ax4.plot(time_ms4, np.abs(burst_signal), 'g--', linewidth=0.3, alpha=0.3, label='|Input|')
-    ax4.plot(time_ms4, burst_output, 'b-', linewidth=1, label='Follower')
+    time_ms4 = _time_ms(len(burst_output), sr)
+    plot_trace(ax4, time_ms4, np.abs(burst_signal), 'g--', linewidth=0.3, alpha=0.3, label='|Input|')
+    plot_trace(ax4, time_ms4, burst_output, 'b-', linewidth=1, label='Follower')
     ax4.set_xlabel('Time (ms)')
     ax4.set_ylabel('Level')
     ax4.set_title('Burst Tracking')
@@ -867,13 +1047,13 @@ def test_envelope_follower():
     ]
 
     ax5 = axes[2, 0]
-    ax5.plot(np.arange(len(test_signal)) / sr * 1000, test_signal, 'k--', linewidth=0.5, alpha=0.5, label='Input')
+    plot_trace(ax5, _time_ms(len(test_signal), sr), test_signal, 'k--', linewidth=0.5, alpha=0.5, label='Input')
 
     for i, cfg in enumerate(configs):
         host_cfg = EnvelopeTestHost(sr)
         host_cfg.create_follower_program(cfg['attack'], cfg['release'], state_id=310+i)
         out = host_cfg.run_with_gate(test_signal)
-        ax5.plot(np.arange(len(out)) / sr * 1000, out, color=cfg['color'], linewidth=1, label=cfg['label'])
+        plot_trace(ax5, _time_ms(len(out), sr), out, color=cfg['color'], linewidth=1, label=cfg['label'])
 
     ax5.set_xlabel('Time (ms)')
     ax5.set_ylabel('Level')
@@ -894,10 +1074,10 @@ def test_envelope_follower():
     am_output = host6.run_with_gate(am_signal)
 
     ax6 = axes[2, 1]
-    time_ms6 = np.arange(len(am_output)) / sr * 1000
-    ax6.plot(time_ms6, np.abs(am_signal), 'g-', linewidth=0.2, alpha=0.3, label='|AM Signal|')
-    ax6.plot(time_ms6, modulator * 0.9, 'r--', linewidth=1, alpha=0.7, label='Modulator envelope')
-    ax6.plot(time_ms6, am_output, 'b-', linewidth=1, label='Follower')
+    time_ms6 = _time_ms(len(am_output), sr)
+    plot_trace(ax6, time_ms6, np.abs(am_signal), 'g-', linewidth=0.2, alpha=0.3, label='|AM Signal|')
+    plot_trace(ax6, time_ms6, modulator * 0.9, 'r--', linewidth=1, alpha=0.7, label='Modulator envelope')
+    plot_trace(ax6, time_ms6, am_output, 'b-', linewidth=1, label='Follower')
     ax6.set_xlabel('Time (ms)')
     ax6.set_ylabel('Level')
     ax6.set_title('AM Signal Envelope Tracking (5 Hz modulation)')
@@ -938,22 +1118,18 @@ def test_envelope_curves():
 
     results = {'sample_rate': sr, 'tests': []}
 
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
     # Analyze attack curve
-    ax1 = axes[0, 0]
     attack_end = int(attack * sr * 1.5)
     attack_region = output[:attack_end]
-    time_ms = np.arange(len(attack_region)) / sr * 1000
 
     # Fit exponential: y = 1 - exp(-t/tau)
     # At t=tau, y = 0.632 (63.2%)
-    idx_63 = np.argmax(attack_region >= 0.632)
+    # The attack rises monotonically, so bisect instead of scanning the region
+    idx_63 = int(np.searchsorted(attack_region, 0.632))
+    if idx_63 == len(attack_region):
+        idx_63 = 0  # never reached; same fallback as argmax on an all-False mask
     tau_attack = idx_63 / sr
 
-    # Generate ideal exponential for comparison
-    ideal_attack = 1 - np.exp(-np.arange(len(attack_region)) / sr / (attack / 4.6))
-
     results['tests'].append({
         'name': 'Attack curve',
         'time_constant_ms': tau_attack * 1000,
@@ -965,31 +1141,19 @@ def test_envelope_curves():
     print(f"    Reaches 63.2%% at {tau_attack*1000:.2f}ms")
     print(f"    Expected time constant: {(attack/4.6)*1000:.2f}ms")
 
-    ax1.plot(time_ms, attack_region, 'b-', linewidth=2, label='Actual')
-    ax1.plot(time_ms, ideal_attack, 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
-    ax1.axhline(0.632, color='green', linestyle=':', alpha=0.5, label='63.2%')
-    ax1.axvline(tau_attack * 1000, color='green', linestyle=':', alpha=0.5)
-    ax1.set_xlabel('Time (ms)')
-    ax1.set_ylabel('Level')
-    ax1.set_title('Attack Curve (exponential)')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
     # Analyze release curve
-    ax2 = axes[0, 1]
     release_start = int(0.5 * sr)
     release_region = output[release_start:release_start + int(release * sr * 2)]
-    time_ms_rel = np.arange(len(release_region)) / sr * 1000
 
     # Find where it reaches 36.8% of starting value (1 time constant)
     start_level = release_region[0]
     target_level = start_level * 0.368
-    idx_37 = np.argmax(release_region <= target_level) if np.any(release_region <= target_level) else len(release_region) - 1
+    # The release falls monotonically (then holds at 0), so the reversed region is
+    # sorted and the samples at or below the target form its leading run
+    num_below = int(np.searchsorted(release_region[::-1], target_level, side='right'))
+    idx_37 = len(release_region) - num_below if num_below else len(release_region) - 1
     tau_release = idx_37 / sr
 
-    # Generate ideal exponential decay
-    ideal_release = start_level * np.exp(-np.arange(len(release_region)) / sr / (release / 4.6))
-
     results['tests'].append({
         'name': 'Release curve',
         'start_level': float(start_level),
@@ -1001,49 +1165,79 @@ def test_envelope_curves():
     print(f"    Starts at {start_level:.3f}")
     print(f"    Reaches 36.8%% of start at {tau_release*1000:.2f}ms")
 
-    ax2.plot(time_ms_rel, release_region, 'b-', linewidth=2, label='Actual')
-    ax2.plot(time_ms_rel, ideal_release, 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
-    ax2.axhline(target_level, color='green', linestyle=':', alpha=0.5, label='36.8% of start')
-    ax2.set_xlabel('Time (ms)')
-    ax2.set_ylabel('Level')
-    ax2.set_title('Release Curve (exponential)')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
+    if PLOT:
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-    # Plot log scale to verify exponential
-    ax3 = axes[1, 0]
-    # Avoid log(0)
-    safe_release = np.maximum(release_region, 1e-6)
-    ax3.semilogy(time_ms_rel, safe_release, 'b-', linewidth=2, label='Actual')
-    ax3.semilogy(time_ms_rel, np.maximum(ideal_release, 1e-6), 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
-    ax3.set_xlabel('Time (ms)')
-    ax3.set_ylabel('Level (log scale)')
-    ax3.set_title('Release Curve (log scale - should be linear)')
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
+        # Attack curve against the ideal exponential
+        ax1 = axes[0, 0]
+        time_ms = _time_ms(len(attack_region), sr)
+        ideal_attack = exp_decay_curve(len(attack_region), attack * sr / 4.6, np.float32)
+        np.subtract(1.0, ideal_attack, out=ideal_attack)
 
-    # Full ADSR visualization
-    ax4 = axes[1, 1]
-    full_time = np.arange(len(output)) / sr * 1000
-    ax4.plot(full_time, output, 'b-', linewidth=2, label='ADSR')
-    ax4.fill_between(full_time, 0, output, alpha=0.3)
-    ax4.plot(full_time, gate * 0.5, 'g--', linewidth=0.5, alpha=0.5, label='Gate')
+        ds = plot_stride(len(attack_region))
+        ax1.plot(time_ms[ds], attack_region[ds], 'b-', linewidth=2, label='Actual')
+        ax1.plot(time_ms[ds], ideal_attack[ds], 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
+        ax1.axhline(0.632, color='green', linestyle=':', alpha=0.5, label='63.2%')
+        ax1.axvline(tau_attack * 1000, color='green', linestyle=':', alpha=0.5)
+        ax1.set_xlabel('Time (ms)')
+        ax1.set_ylabel('Level')
+        ax1.set_title('Attack Curve (exponential)')
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
 
-    # Annotate stages
-    ax4.annotate('Attack', xy=(attack*500, 0.5), fontsize=10)
-    ax4.annotate('Decay', xy=((attack+0.025)*1000, 0.85), fontsize=10)
-    ax4.annotate('Sustain', xy=(250, 0.65), fontsize=10)
-    ax4.annotate('Release', xy=(550, 0.35), fontsize=10)
+        # Release curve against the ideal exponential decay
+        ax2 = axes[0, 1]
+        time_ms_rel = _time_ms(len(release_region), sr)
+        ideal_release = exp_decay_curve(len(release_region), release * sr / 4.6, np.float32)
+        ideal_release *= start_level
 
-    ax4.set_xlabel('Time (ms)')
-    ax4.set_ylabel('Level')
-    ax4.set_title('Full ADSR Envelope')
-    ax4.legend()
-    ax4.grid(True, alpha=0.3)
+        ds = plot_stride(len(release_region))
+        ax2.plot(time_ms_rel[ds], release_region[ds], 'b-', linewidth=2, label='Actual')
+        ax2.plot(time_ms_rel[ds], ideal_release[ds], 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
+        ax2.axhline(target_level, color='green', linestyle=':', alpha=0.5, label='36.8% of start')
+        ax2.set_xlabel('Time (ms)')
+        ax2.set_ylabel('Level')
+        ax2.set_title('Release Curve (exponential)')
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    save_figure(fig, 'output/env_curves.png')
-    print(f"\n  Saved: output/env_curves.png")
+        # Plot log scale to verify exponential
+        ax3 = axes[1, 0]
+        # Avoid log(0); clipping the thinned views copies, so the linear plot is untouched
+        safe_release = np.clip(release_region[ds], 1e-6, None)
+        safe_ideal_release = np.clip(ideal_release[ds], 1e-6, None)
+        ax3.semilogy(time_ms_rel[ds], safe_release, 'b-', linewidth=2, label='Actual')
+        ax3.semilogy(time_ms_rel[ds], safe_ideal_release, 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
+        ax3.set_xlabel('Time (ms)')
+        ax3.set_ylabel('Level (log scale)')
+        ax3.set_title('Release Curve (log scale - should be linear)')
+        ax3.legend()
+        ax3.grid(True, alpha=0.3)
+
+        # Full ADSR visualization
+        ax4 = axes[1, 1]
+        full_time = _time_ms(len(output), sr)
+        ds = plot_stride(len(output))
+        plot_trace(ax4, full_time[ds], output[ds], 'b-', linewidth=2, label='ADSR')
+        ax4.fill_between(full_time[ds], 0, output[ds], alpha=0.3)
+        plot_trace(ax4, *step_trace(full_time, gate * 0.5), 'g--', linewidth=0.5, alpha=0.5,
+                   drawstyle='steps-post', label='Gate')
+
+        # Annotate stages
+        ax4.annotate('Attack', xy=(attack*500, 0.5), fontsize=10)
+        ax4.annotate('Decay', xy=((attack+0.025)*1000, 0.85), fontsize=10)
+        ax4.annotate('Sustain', xy=(250, 0.65), fontsize=10)
+        ax4.annotate('Release', xy=(550, 0.35), fontsize=10)
+
+        ax4.set_xlabel('Time (ms)')
+        ax4.set_ylabel('Level')
+        ax4.set_title('Full ADSR Envelope')
+        ax4.legend()
+        ax4.grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        save_figure(fig, 'output/env_curves.png')
+        print(f"\n  Saved: output/env_curves.png")
 
     with open('output/env_curves.json', 'w') as f:
         json.dump(results, f, indent=2, cls=NumpyEncoder)
@@ -1086,28 +1280,29 @@ def test_sample_accurate_timing():
     print("\n  ADSR Attack Sample Accuracy:")
 
     attack_times_ms = [1, 5, 10, 20, 50, 100]
+    decay = 0.05
+    sustain = 0.7
+    release = 0.1
 
-    for attack_ms in attack_times_ms:
+    # All attack times share one gate, so run them as a single bank
+    gate = np.ones(int(0.3 * sr), dtype=np.float32)
+    host = EnvelopeTestHost(sr)
+    out_bufs = host.create_adsr_bank(
+        [(attack_ms / 1000.0, decay, sustain, release) for attack_ms in attack_times_ms],
+        state_id_base=600
+    )
+    all_outputs = host.run_with_gate_buffers(gate, out_bufs)
+
+    for idx, attack_ms in enumerate(attack_times_ms):
         attack_sec = attack_ms / 1000.0
-        decay = 0.05
-        sustain = 0.7
-        release = 0.1
 
         # Expected samples to reach 99% (using coefficient -4.6)
-        expected_samples = int(attack_sec * sr)
+        expected_samples = theoretical_crossing_sample(attack_sec, sr, 0.99)
 
-        gate = np.ones(int(0.3 * sr), dtype=np.float32)
-
-        host = EnvelopeTestHost(sr)
-        host.create_adsr_program(attack_sec, decay, sustain, release, state_id=600 + attack_ms)
-        output = host.run_with_gate(gate)
+        output = all_outputs[idx]
 
         # Find exact sample where we first reach 0.99
-        peak_sample = -1
-        for i, v in enumerate(output):
-            if v >= 0.99:
-                peak_sample = i
-                break
+        peak_sample = _first_crossing(output, 0.99, 0, rising=True)
 
         error_samples = peak_sample - expected_samples if peak_sample >= 0 else float('nan')
         error_percent = (error_samples / expected_samples * 100) if expected_samples > 0 else 0
@@ -1136,6 +1331,11 @@ def test_sample_accurate_timing():
 
     ar_attack_times_ms = [1, 5, 10, 20]
 
+    # Single trigger at sample 100, shared by every attack time
+    trigger_offset = 100
+    trigger = np.zeros(int(0.3 * sr), dtype=np.float32)
+    trigger[trigger_offset] = 1.0
+
     for attack_ms in ar_attack_times_ms:
         attack_sec = attack_ms / 1000.0
         release = 0.1
@@ -1143,13 +1343,10 @@ def test_sample_accurate_timing():
         # The opcode transitions from attack to release when level >= 0.999
         # With exponential curve: level = 1 - exp(-4.6 * t / attack_samples)
         # Time to reach 0.999: t ≈ 1.5 * attack_samples (since ln(0.001)/-4.6 ≈ 1.5)
-        expected_peak_sample = int(attack_sec * sr * 1.5)
-
-        # Single trigger at sample 100
-        trigger_offset = 100
-        trigger = np.zeros(int(0.3 * sr), dtype=np.float32)
-        trigger[trigger_offset] = 1.0
+        expected_peak_sample = theoretical_crossing_sample(attack_sec, sr, 0.999)
 
+        # New host per attack time: VM.reset() keeps the parameter map, so a
+        # reused VM would slew "attack" from the previous value
         host = EnvelopeTestHost(sr)
         host.create_ar_program(attack_sec, release, state_id=700 + attack_ms)
         output = host.run_with_gate(trigger)
@@ -1181,26 +1378,22 @@ def test_sample_accurate_timing():
 
     gate_on_samples = [128, 256, 512, 1000, 2000]
 
-    for gate_on_sample in gate_on_samples:
-        attack = 0.01
-        decay = 0.05
-        sustain = 0.7
-        release = 0.1
+    # Same envelope for every gate position: load it once, reset between runs
+    host = EnvelopeTestHost(sr)
+    host.create_adsr_program(0.01, 0.05, 0.7, 0.1, state_id=800)
+    gate = np.empty(int(0.5 * sr), dtype=np.float32)
 
-        gate = np.zeros(int(0.5 * sr), dtype=np.float32)
+    for gate_on_sample in gate_on_samples:
+        gate.fill(0.0)
         gate[gate_on_sample:gate_on_sample + int(0.3 * sr)] = 1.0
 
-        host = EnvelopeTestHost(sr)
-        host.create_adsr_program(attack, decay, sustain, release, state_id=800 + gate_on_sample)
+        host.reset()
         output = host.run_with_gate(gate)
 
         # Find first sample where output rises above threshold
         threshold = 0.01
-        first_rise_sample = -1
-        for i in range(gate_on_sample, len(output)):
-            if output[i] > threshold:
-                first_rise_sample = i
-                break
+        first_rise_sample = _first_crossing(output, threshold, gate_on_sample,
+                                            rising=True, strict=True)
 
         # Should be within 1 block (128 samples) of gate on
         delay_samples = first_rise_sample - gate_on_sample if first_rise_sample >= 0 else float('nan')
@@ -1254,42 +1447,46 @@ def test_exponential_accuracy():
     host.create_adsr_program(attack, 0.05, 0.7, 0.1, state_id=900)
     output = host.run_with_gate(gate)
 
-    # Generate ideal exponential curve for comparison
-    t = np.arange(len(output))
+    # Generate ideal exponential curve for comparison (attack phase only)
     tau = attack_samples / 4.6  # time constant
-    ideal_attack = 1 - np.exp(-t / tau)
+    ideal_attack_region = exp_decay_curve(attack_samples, tau, np.float32)
+    np.subtract(1.0, ideal_attack_region, out=ideal_attack_region)
 
     # Compare attack phase
     attack_region = output[:attack_samples]
-    ideal_attack_region = ideal_attack[:attack_samples]
 
-    # Calculate error statistics
-    errors = attack_region - ideal_attack_region
-    max_error = float(np.max(np.abs(errors)))
-    rms_error = float(np.sqrt(np.mean(errors ** 2)))
-    mean_error = float(np.mean(errors))
+    # Calculate error statistics from reductions over one error buffer
+    errors = np.empty(attack_samples, dtype=np.float32)
+    np.subtract(attack_region, ideal_attack_region, out=errors)
+    max_error = float(max(errors.max(), -errors.min()))
+    rms_error = float(np.sqrt(np.dot(errors, errors) / attack_samples))
+    mean_error = float(errors.sum() / attack_samples)
 
     # Check at specific time points
-    checkpoints = [0.25, 0.5, 0.75, 1.0]  # fractions of attack time
+    checkpoints = np.array([0.25, 0.5, 0.75, 1.0])  # fractions of attack time
+    checkpoint_samples = (checkpoints * attack_samples).astype(np.intp)
+    in_range = checkpoint_samples < len(output)
+    checkpoints = checkpoints[in_range]
+    checkpoint_samples = checkpoint_samples[in_range]
+    checkpoint_expected = 1 - np.exp(-4.6 * checkpoints)
+    checkpoint_measured = output[checkpoint_samples]
+    checkpoint_errors = np.abs(checkpoint_measured - checkpoint_expected)
     checkpoint_results = []
 
     print("\n  Attack curve checkpoints:")
-    for frac in checkpoints:
-        sample_idx = int(frac * attack_samples)
-        if sample_idx < len(output):
-            expected = 1 - np.exp(-4.6 * frac)
-            measured = output[sample_idx]
-            error = abs(measured - expected)
-            checkpoint_results.append({
-                'fraction': frac,
-                'sample': sample_idx,
-                'expected': float(expected),
-                'measured': float(measured),
-                'error': float(error)
-            })
-            status = "PASS" if error < 0.05 else "FAIL"
-            print(f"    t={frac:.2f}*attack: expected={expected:.4f}, measured={measured:.4f}, "
-                  f"error={error:.4f} [{status}]")
+    for frac, sample_idx, expected, measured, error in zip(
+            checkpoints.tolist(), checkpoint_samples.tolist(), checkpoint_expected.tolist(),
+            checkpoint_measured.tolist(), checkpoint_errors.tolist()):
+        checkpoint_results.append({
+            'fraction': frac,
+            'sample': sample_idx,
+            'expected': expected,
+            'measured': measured,
+            'error': error
+        })
+        status = "PASS" if error < 0.05 else "FAIL"
+        print(f"    t={frac:.2f}*attack: expected={expected:.4f}, measured={measured:.4f}, "
+              f"error={error:.4f} [{status}]")
 
     results['tests'].append({
         'name': 'Attack curve accuracy',
@@ -1301,54 +1498,59 @@ def test_exponential_accuracy():
 
     print(f"\n  Overall: max_error={max_error:.4f}, rms_error={rms_error:.4f}")
 
-    # Plot comparison
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-    # Attack phase
-    ax1 = axes[0, 0]
-    time_ms = np.arange(attack_samples) / sr * 1000
-    ax1.plot(time_ms, attack_region, 'b-', linewidth=1.5, label='Measured')
-    ax1.plot(time_ms, ideal_attack_region, 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
-    ax1.set_xlabel('Time (ms)')
-    ax1.set_ylabel('Level')
-    ax1.set_title('Attack Phase Comparison')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
-    # Error plot
-    ax2 = axes[0, 1]
-    ax2.plot(time_ms, errors, 'b-', linewidth=0.8)
-    ax2.axhline(0, color='gray', linewidth=0.5)
-    ax2.set_xlabel('Time (ms)')
-    ax2.set_ylabel('Error')
-    ax2.set_title(f'Error (max={max_error:.4f})')
-    ax2.grid(True, alpha=0.3)
+    if PLOT:
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-    # Log scale comparison
-    ax3 = axes[1, 0]
-    # Plot 1-level to show exponential approach on log scale
-    safe_attack = np.maximum(1.0 - attack_region, 1e-6)
-    safe_ideal = np.maximum(1.0 - ideal_attack_region, 1e-6)
-    ax3.semilogy(time_ms, safe_attack, 'b-', linewidth=1.5, label='Measured')
-    ax3.semilogy(time_ms, safe_ideal, 'r--', linewidth=1, alpha=0.7, label='Ideal')
-    ax3.set_xlabel('Time (ms)')
-    ax3.set_ylabel('1 - Level (log scale)')
-    ax3.set_title('Exponential Verification (should be linear on log scale)')
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
+        # Attack phase
+        ax1 = axes[0, 0]
+        time_ms = _time_ms(attack_samples, sr)
+        ds = plot_stride(attack_samples)
+        ax1.plot(time_ms[ds], attack_region[ds], 'b-', linewidth=1.5, label='Measured')
+        ax1.plot(time_ms[ds], ideal_attack_region[ds], 'r--', linewidth=1, alpha=0.7, label='Ideal exp')
+        ax1.set_xlabel('Time (ms)')
+        ax1.set_ylabel('Level')
+        ax1.set_title('Attack Phase Comparison')
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
 
-    # Histogram of errors
-    ax4 = axes[1, 1]
-    ax4.hist(errors, bins=50, edgecolor='black', alpha=0.7)
-    ax4.axvline(0, color='red', linestyle='--')
-    ax4.set_xlabel('Error')
-    ax4.set_ylabel('Count')
-    ax4.set_title('Error Distribution')
-    ax4.grid(True, alpha=0.3)
+        # Error plot
+        ax2 = axes[0, 1]
+        ax2.plot(time_ms, errors, 'b-', linewidth=0.8)
+        ax2.axhline(0, color='gray', linewidth=0.5)
+        ax2.set_xlabel('Time (ms)')
+        ax2.set_ylabel('Error')
+        ax2.set_title(f'Error (max={max_error:.4f})')
+        ax2.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    save_figure(fig, 'output/env_exponential_accuracy.png')
-    print(f"  Saved: output/env_exponential_accuracy.png")
+        # Log scale comparison
+        ax3 = axes[1, 0]
+        # Plot 1-level to show exponential approach on log scale
+        safe_attack = np.subtract(1.0, attack_region[ds])
+        np.clip(safe_attack, 1e-6, None, out=safe_attack)
+        safe_ideal = np.subtract(1.0, ideal_attack_region[ds])
+        np.clip(safe_ideal, 1e-6, None, out=safe_ideal)
+        ax3.semilogy(time_ms[ds], safe_attack, 'b-', linewidth=1.5, label='Measured')
+        ax3.semilogy(time_ms[ds], safe_ideal, 'r--', linewidth=1, alpha=0.7, label='Ideal')
+        ax3.set_xlabel('Time (ms)')
+        ax3.set_ylabel('1 - Level (log scale)')
+        ax3.set_title('Exponential Verification (should be linear on log scale)')
+        ax3.legend()
+        ax3.grid(True, alpha=0.3)
+
+        # Histogram of errors
+        ax4 = axes[1, 1]
+        # One stepped patch instead of a Rectangle per bin
+        counts, edges = np.histogram(errors, bins=50)
+        ax4.stairs(counts, edges, fill=True, edgecolor='black', alpha=0.7)
+        ax4.axvline(0, color='red', linestyle='--')
+        ax4.set_xlabel('Error')
+        ax4.set_ylabel('Count')
+        ax4.set_title('Error Distribution')
+        ax4.grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        save_figure(fig, 'output/env_exponential_accuracy.png')
+        print(f"  Saved: output/env_exponential_accuracy.png")
 
     with open('output/env_exponential_accuracy.json', 'w') as f:
         json.dump(results, f, indent=2, cls=NumpyEncoder)
@@ -1362,6 +1564,13 @@ def test_exponential_accuracy():
 # =============================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--no-plot', action='store_true', help='skip the optional figures')
+    if parser.parse_args().no_plot:
+        PLOT = False
+        # Spawned workers re-import this module and read the flag from the environment
+        os.environ['CEDAR_TEST_NO_PLOT'] = '1'
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     os.makedirs('output', exist_ok=True)
@@ -1370,13 +1579,17 @@ if __name__ == "__main__":
     print("=" * 60)
     print()
 
-    test_adsr_timing()
-    test_adsr_gate_edges()
-    test_ar_envelope()
-    test_envelope_follower()
-    test_envelope_curves()
-    test_sample_accurate_timing()
-    test_exponential_accuracy()
+    tests = [
+        test_adsr_timing,
+        test_adsr_gate_edges,
+        test_ar_envelope,
+        test_envelope_follower,
+        test_envelope_curves,
+        test_sample_accurate_timing,
+        test_exponential_accuracy,
+    ]
+
+    run_tests_in_processes(tests)
 
     print()
     print("=" * 60)
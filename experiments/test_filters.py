@@ -1,23 +1,33 @@
+import argparse
+import functools
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 import cedar_core as cedar
 from cedar_testing import CedarTestHost
 from visualize import plot_frequency_response, save_figure
+import scipy.fft
 import scipy.signal
 import scipy.io.wavfile
 
+# Set CEDAR_TEST_NO_PLOT=1 or pass --no-plot to skip the SVF and Moog
+# response figures
+PLOT = not os.environ.get('CEDAR_TEST_NO_PLOT')
+
+@functools.lru_cache(maxsize=8)
 def get_impulse(duration_sec, sample_rate):
-    """Generate a unit impulse signal."""
+    """Generate a unit impulse signal (cached and read-only; copy before modifying)."""
     n = int(duration_sec * sample_rate)
     x = np.zeros(n, dtype=np.float32)
     x[0] = 1.0
+    x.setflags(write=False)
     return x
 
-def analyze_filter(filter_op, cutoff, res, filter_type_name):
+def run_filter_ir(filter_op, cutoff, res, filter_type_name, sr=48000):
     """
-    Runs an impulse through the specified filter opcode and plots frequency response.
+    Runs an impulse through the specified filter opcode and returns the impulse response.
     """
-    sr = 48000
     host = CedarTestHost(sr)
 
     # 1. Setup Parameters
@@ -41,22 +51,62 @@ def analyze_filter(filter_op, cutoff, res, filter_type_name):
     # 4. Run Analysis
     # Use Impulse Response -> FFT to get Bode plot
     impulse = get_impulse(0.1, sr) # 100ms is enough for IR
-    response = host.process(impulse)
+    return host.process(impulse)
+
+def analyze_filter(filter_op, cutoff, res, filter_type_name):
+    """
+    Runs an impulse through the specified filter opcode and returns its frequency response.
+    """
+    sr = 48000
+    response = run_filter_ir(filter_op, cutoff, res, filter_type_name, sr)
 
     # Calculate Frequency Response
     freqs, mag_db = get_bode_data(response, sr)
 
     return freqs, mag_db
 
+def spectrum_db(H):
+    """Magnitude of a complex spectrum in dB, computed from power to skip the sqrt."""
+    mag = np.square(H.real)
+    mag += np.square(H.imag)
+    mag += 1e-20
+    np.log10(mag, out=mag)
+    mag *= 10
+    return mag
+
 def get_bode_data(impulse_response, sr):
-    """Convert IR to Magnitude (dB) vs Frequency."""
+    """Convert IR to Magnitude (dB) vs Frequency.
+
+    A 2-D input of stacked responses is transformed in one batched FFT along
+    the last axis. The response is zero-padded to the next 2/3/5-smooth
+    length if needed, so odd IR lengths never hit the slow prime-size path.
+    """
     # FFT
-    H = np.fft.rfft(impulse_response)
-    freqs = np.fft.rfftfreq(len(impulse_response), 1/sr)
+    n_fft = scipy.fft.next_fast_len(impulse_response.shape[-1], real=True)
+    H = scipy.fft.rfft(impulse_response, n=n_fft, axis=-1, workers=-1)
+    freqs = scipy.fft.rfftfreq(n_fft, 1/sr)
 
     # Magnitude in dB
-    mag = 20 * np.log10(np.abs(H) + 1e-10)
-    return freqs, mag
+    return freqs, spectrum_db(H)
+
+def svf_biquad(filter_op, cutoff, q, sr):
+    """
+    Biquad (b, a) coefficients with the same transfer function as a FILTER_SVF_* opcode.
+
+    The opcodes are a trapezoidal state variable filter, which is exactly the
+    bilinear transform of the analog prototype with a prewarped cutoff, so
+    the response can be evaluated directly with scipy.signal.freqz.
+    """
+    cutoff = min(max(cutoff, 20.0), sr * 0.49)
+    g = np.tan(np.pi * cutoff / sr)
+    k = 1.0 / max(q, 0.1)
+    a = [1.0 + g * (g + k), 2.0 * (g * g - 1.0), 1.0 + g * (g - k)]
+    b = {
+        cedar.Opcode.FILTER_SVF_LP: [g * g, 2.0 * g * g, g * g],
+        cedar.Opcode.FILTER_SVF_HP: [1.0, -2.0, 1.0],
+        cedar.Opcode.FILTER_SVF_BP: [g, 0.0, -g],
+    }[filter_op]
+    return b, a
 
 def test_svf_comparison():
     print("Test: SVF Filter Response Comparison")
@@ -71,13 +121,34 @@ def test_svf_comparison():
         (cedar.Opcode.FILTER_SVF_BP, "Bandpass")
     ]
 
+    sr = 48000
+    responses = np.stack([run_filter_ir(op, cutoff, q, name, sr) for op, name in filters])
+    freqs, mags = get_bode_data(responses, sr)
+
+    # Informational cross-check of the measured responses against the
+    # analytic biquads; the deviation is reported, not asserted
+    ref_mags = np.empty_like(mags)
+    for (op, name), ref_mag in zip(filters, ref_mags):
+        _, H = scipy.signal.freqz(*svf_biquad(op, cutoff, q, sr), worN=freqs, fs=sr)
+        ref_mag[:] = spectrum_db(H)
+
+    band = (freqs >= 20) & (freqs <= 20000)
+    for (op, name), mag, ref_mag in zip(filters, mags, ref_mags):
+        # Only compare where the response is above the plot floor
+        valid = band & (ref_mag > -60)
+        deviation = np.max(np.abs(mag[valid] - ref_mag[valid]))
+        print(f"  {name}: max deviation from analytic response {deviation:.3f} dB (info)")
+
+    if not PLOT:
+        return
+
     plt.figure(figsize=(12, 6))
 
-    for op, name in filters:
-        freqs, mag = analyze_filter(op, cutoff, q, name)
-        plt.semilogx(freqs, mag, label=name)
+    for (op, name), mag, ref_mag in zip(filters, mags, ref_mags):
+        line, = plt.semilogx(freqs, mag, label=name)
+        plt.semilogx(freqs, ref_mag, color=line.get_color(), linestyle=':', linewidth=1)
 
-    plt.title(f'SVF Topology Comparison (Fc={cutoff}Hz, Q={q})')
+    plt.title(f'SVF Topology Comparison (Fc={cutoff}Hz, Q={q}, dotted: analytic)')
     plt.xlabel('Frequency (Hz)')
     plt.ylabel('Magnitude (dB)')
     plt.grid(True, which='both', alpha=0.3)
@@ -94,10 +165,17 @@ def test_moog_resonance():
     cutoff = 2000.0
     resonance_values = [0.0, 1.0, 2.0, 3.0, 3.8] # 4.0 is self-oscillation
 
+    sr = 48000
+    responses = np.stack([run_filter_ir(cedar.Opcode.FILTER_MOOG, cutoff, res, "Moog", sr)
+                          for res in resonance_values])
+    freqs, mags = get_bode_data(responses, sr)
+
+    if not PLOT:
+        return
+
     plt.figure(figsize=(12, 6))
 
-    for res in resonance_values:
-        freqs, mag = analyze_filter(cedar.Opcode.FILTER_MOOG, cutoff, res, "Moog")
+    for res, mag in zip(resonance_values, mags):
         plt.semilogx(freqs, mag, label=f'Resonance {res}')
 
     plt.title(f'Moog Ladder Resonance (Fc={cutoff}Hz)')
@@ -111,11 +189,11 @@ def test_moog_resonance():
     save_figure(plt.gcf(), "output/filter_moog_resonance.png")
     print("  Saved output/filter_moog_resonance.png")
 
-def analyze_diode_filter(cutoff, res, vt=0.026, fb_gain=10.0, filter_name="Diode"):
+def run_diode_ir(cutoff, res, vt=0.026, fb_gain=10.0, filter_name="Diode", sr=48000):
     """
-    Runs an impulse through FILTER_DIODE with tunable vt/fb_gain parameters.
+    Runs an impulse through FILTER_DIODE with tunable vt/fb_gain parameters
+    and returns the impulse response.
     """
-    sr = 48000
     host = CedarTestHost(sr)
 
     buf_in = 0
@@ -137,7 +215,14 @@ def analyze_diode_filter(cutoff, res, vt=0.026, fb_gain=10.0, filter_name="Diode
     )
 
     impulse = get_impulse(0.1, sr)
-    response = host.process(impulse)
+    return host.process(impulse)
+
+def analyze_diode_filter(cutoff, res, vt=0.026, fb_gain=10.0, filter_name="Diode"):
+    """
+    Runs an impulse through FILTER_DIODE and returns its frequency response.
+    """
+    sr = 48000
+    response = run_diode_ir(cutoff, res, vt, fb_gain, filter_name, sr)
     freqs, mag_db = get_bode_data(response, sr)
     return freqs, mag_db
 
@@ -149,10 +234,14 @@ def test_diode_frequency_response():
     cutoff = 1000.0
     resonance_values = [0.0, 1.0, 2.0, 3.0, 3.5]  # 3.5+ = self-oscillation
 
+    sr = 48000
+    responses = np.stack([run_diode_ir(cutoff, res, vt=0.026, fb_gain=10.0, sr=sr)
+                          for res in resonance_values])
+    freqs, mags = get_bode_data(responses, sr)
+
     plt.figure(figsize=(12, 6))
 
-    for res in resonance_values:
-        freqs, mag = analyze_diode_filter(cutoff, res, vt=0.026, fb_gain=10.0)
+    for res, mag in zip(resonance_values, mags):
         plt.semilogx(freqs, mag, label=f'Resonance {res}')
 
     plt.title(f'Diode Ladder Filter (Fc={cutoff}Hz)')
@@ -206,6 +295,11 @@ def test_diode_self_oscillation():
 
     results = []
 
+    # Short noise burst to excite oscillation, then silence. Built once so every
+    # config is kicked by the same burst (process() copies its input).
+    signal = np.zeros(int(duration * sr), dtype=np.float32)
+    signal[:100] = np.random.default_rng(0).uniform(-0.5, 0.5, 100)
+
     for idx, (name, vt, fb_gain, expect_osc) in enumerate(configs):
         host = CedarTestHost(sr)
 
@@ -227,9 +321,6 @@ def test_diode_self_oscillation():
             cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, buf_out)
         )
 
-        # Feed short noise burst to excite oscillation, then silence
-        signal = np.zeros(int(duration * sr), dtype=np.float32)
-        signal[:100] = np.random.uniform(-0.5, 0.5, 100).astype(np.float32)
         output = host.process(signal)
 
         # Save WAV for human evaluation
@@ -253,15 +344,15 @@ def test_diode_self_oscillation():
 
         if is_oscillating:
             fft_size = 8192
-            freqs = np.fft.rfftfreq(fft_size, 1/sr)
-            spectrum = np.abs(np.fft.rfft(steady[:fft_size]))
-            spectrum_db = 20 * np.log10(spectrum + 1e-10)
+            freqs = scipy.fft.rfftfreq(fft_size, 1/sr)
+            spectrum = np.abs(scipy.fft.rfft(steady[:fft_size], workers=-1))
+            spec_db = 20 * np.log10(spectrum + 1e-10)
 
             peak_idx = np.argmax(spectrum)
             peak_freq = freqs[peak_idx]
             freq_error = abs(peak_freq - cutoff) / cutoff * 100
 
-            axes[idx, 1].plot(freqs, spectrum_db)
+            axes[idx, 1].plot(freqs, spec_db)
             axes[idx, 1].axvline(cutoff, color='red', linestyle='--', alpha=0.7, label=f'Expected {cutoff}Hz')
             axes[idx, 1].axvline(peak_freq, color='green', linestyle=':', alpha=0.7, label=f'Actual {peak_freq:.0f}Hz')
             axes[idx, 1].set_xlabel('Frequency (Hz)')
@@ -398,13 +489,13 @@ def test_formant_vowels():
 
         # Analyze spectrum
         fft_size = 8192
-        freqs = np.fft.rfftfreq(fft_size, 1/sr)
-        spectrum = np.abs(np.fft.rfft(output[:fft_size]))
-        spectrum_db = 20 * np.log10(spectrum + 1e-10)
+        freqs = scipy.fft.rfftfreq(fft_size, 1/sr)
+        spectrum = np.abs(scipy.fft.rfft(output[:fft_size], workers=-1))
+        spec_db = 20 * np.log10(spectrum + 1e-10)
 
         # Smooth spectrum for visualization
         from scipy.ndimage import gaussian_filter1d
-        spectrum_smooth = gaussian_filter1d(spectrum_db, sigma=10)
+        spectrum_smooth = gaussian_filter1d(spec_db, sigma=10)
 
         ax = axes[vowel_idx // 2, vowel_idx % 2]
         vowel_name, expected_formants = vowel_table[vowel_idx]
@@ -548,7 +639,8 @@ def test_sallenkey_modes():
     for mode_idx, mode in enumerate([0.0, 1.0]):  # 0=LP, 1=HP
         mode_name = "Lowpass" if mode == 0.0 else "Highpass"
 
-        for res in resonance_values:
+        responses = np.empty((len(resonance_values), int(0.1 * sr)), dtype=np.float32)
+        for res, response in zip(resonance_values, responses):
             host = CedarTestHost(sr)
 
             buf_in = 0
@@ -568,13 +660,14 @@ def test_sallenkey_modes():
                 cedar.Instruction.make_unary(cedar.Opcode.OUTPUT, 0, buf_out)
             )
 
-            # Impulse response
+            # Impulse response, written into this resonance's row
             impulse = get_impulse(0.1, sr)
-            response = host.process(impulse)
+            host.process(impulse, out=response)
 
-            # FFT
-            freqs, mag_db = get_bode_data(response, sr)
+        # FFT of all resonances at once
+        freqs, mags = get_bode_data(responses, sr)
 
+        for res, mag_db in zip(resonance_values, mags):
             axes[mode_idx, 0].semilogx(freqs, mag_db, label=f'Res={res}')
 
         axes[mode_idx, 0].set_title(f'Sallen-Key {mode_name} (Fc={cutoff}Hz)')
@@ -707,10 +800,11 @@ def test_sallenkey_character():
 
     # Spectrum comparison
     fft_size = 4096
-    freqs = np.fft.rfftfreq(fft_size, 1/sr)
+    freqs = scipy.fft.rfftfreq(fft_size, 1/sr)
 
-    spec_in = 20 * np.log10(np.abs(np.fft.rfft(sine_input[:fft_size])) + 1e-10)
-    spec_out = 20 * np.log10(np.abs(np.fft.rfft(output[:fft_size])) + 1e-10)
+    # Input and output spectra in one batched transform
+    spectra = scipy.fft.rfft(np.stack((sine_input[:fft_size], output[:fft_size])), workers=-1)
+    spec_in, spec_out = 20 * np.log10(np.abs(spectra) + 1e-10)
 
     axes[1, 0].plot(freqs[:500], spec_in[:500], label='Input', alpha=0.7)
     axes[1, 0].plot(freqs[:500], spec_out[:500], label='Output')
@@ -740,7 +834,11 @@ def test_sallenkey_character():
 
 
 if __name__ == "__main__":
-    import os
+    parser = argparse.ArgumentParser(description='Cedar filter response tests')
+    parser.add_argument('--no-plot', action='store_true', help='skip the optional figures')
+    if parser.parse_args().no_plot:
+        PLOT = False
+
     os.makedirs('output', exist_ok=True)
 
     # Original tests
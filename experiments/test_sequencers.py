@@ -34,8 +34,10 @@ def save_wav(filename: str, data: np.ndarray, sample_rate: int = 48000):
     wav_dir = 'output/wav'
     os.makedirs(wav_dir, exist_ok=True)
     filepath = os.path.join(wav_dir, filename)
-    data_clipped = np.clip(data, -1.0, 1.0)
-    data_int16 = (data_clipped * 32767).astype(np.int16)
+    # Scale, clip and truncate through one float32 scratch buffer
+    scaled = np.multiply(data, 32767.0, dtype=np.float32)
+    np.clip(scaled, -32767.0, 32767.0, out=scaled)
+    data_int16 = scaled.astype(np.int16)
     wavfile.write(filepath, sample_rate, data_int16)
     print(f"    Saved: {filepath}")
 
@@ -5,6 +5,8 @@ DSP Utility Functions
 Helper functions for common DSP operations.
 """
 
+import json
+
 import numpy as np
 from typing import Tuple
 
@@ -61,6 +63,77 @@ def rms(signal: np.ndarray) -> float:
     return np.sqrt(np.mean(signal ** 2))
 
 
+def mean_std(signal: np.ndarray) -> Tuple[float, float]:
+    """Calculate mean and standard deviation from one set of running sums.
+
+    Equivalent to ``(np.mean(signal), np.std(signal))`` without the
+    centered copy np.std builds. Sums are taken in float64 so the
+    ``E[x^2] - E[x]^2`` difference keeps its precision for small ripple
+    on a large DC level.
+
+    Args:
+        signal: Input signal
+
+    Returns:
+        (mean, standard deviation)
+    """
+    x = np.asarray(signal, dtype=np.float64).ravel()
+    n = x.size
+    mean = x.sum() / n
+    var = np.dot(x, x) / n - mean * mean
+    return float(mean), float(np.sqrt(max(var, 0.0)))
+
+
+def boxcar_mean(signal: np.ndarray, window: int) -> np.ndarray:
+    """Centered moving average, equivalent to
+    ``np.convolve(signal, np.ones(window) / window, mode='same')``.
+    
+    Uses a running sum, so the cost is O(N) regardless of window length.
+    
+    Args:
+        signal: Input signal
+        window: Window length in samples
+        
+    Returns:
+        Smoothed signal, same length as the input
+    """
+    n = len(signal)
+    csum = np.zeros(n + 1)
+    np.cumsum(signal, out=csum[1:])
+    # Output sample i averages signal[i - window + 1 + offset : i + 1 + offset]
+    offset = (window - 1) // 2
+    idx = np.arange(n) + offset
+    hi = np.minimum(idx + 1, n)
+    lo = np.clip(idx - window + 1, 0, n)
+    return (csum[hi] - csum[lo]) / window
+
+
+def find_peaks_above(x: np.ndarray, threshold: float, min_gap: float = 0) -> np.ndarray:
+    """Find local maxima above a threshold.
+
+    Args:
+        x: Signal to search
+        threshold: Peaks must be strictly above this level
+        min_gap: Minimum spacing in samples; a peak is kept only if it lies
+            more than min_gap after the previously kept one
+
+    Returns:
+        Array of peak indices
+    """
+    mid = x[1:-1]
+    peaks = np.flatnonzero((mid > x[:-2]) & (mid > x[2:]) & (mid > threshold)) + 1
+    if min_gap <= 0 or peaks.size == 0:
+        return peaks
+
+    # Jump from each kept peak straight to the first candidate past the gap
+    kept = []
+    k = 0
+    while k < len(peaks):
+        kept.append(peaks[k])
+        k = np.searchsorted(peaks, peaks[k] + min_gap, side='right')
+    return np.array(kept, dtype=peaks.dtype)
+
+
 def peak_to_peak(signal: np.ndarray) -> float:
     """Calculate peak-to-peak amplitude.
     
@@ -316,3 +389,30 @@ def save_audio(
     # Clip to prevent clipping distortion
     signal = np.clip(signal, -1, 1)
     sf.write(path, signal, sample_rate)
+
+
+_NUMPY_TO_JSON = {
+    **dict.fromkeys((np.int8, np.int16, np.int32, np.int64,
+                     np.uint8, np.uint16, np.uint32, np.uint64), int),
+    **dict.fromkeys((np.float16, np.float32, np.float64), float),
+    np.bool_: bool,
+    np.ndarray: np.ndarray.tolist,
+}
+
+
+class NumpyEncoder(json.JSONEncoder):
+    """JSON encoder that handles numpy types."""
+    def default(self, obj):
+        # Exact-type lookup first; the isinstance chain covers any other scalar types
+        convert = _NUMPY_TO_JSON.get(type(obj))
+        if convert is not None:
+            return convert(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.bool_):
+            return bool(obj)
+        return super().default(obj)
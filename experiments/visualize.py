@@ -607,5 +607,7 @@ def save_figure(fig: Figure, path: str, dpi: int = 150):
         path: Output file path
         dpi: Resolution in dots per inch
     """
-    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    # Let Agg render long waveform paths in chunks instead of one huge path
+    with plt.rc_context({'agg.path.chunksize': 10000}):
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
     plt.close(fig)